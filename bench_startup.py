@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark du démarrage : temps jusqu'à la première réponse d'un nouveau processus.
+
+Chaque mesure lance un interpréteur neuf (comme un worker après un autoscaling),
+importe et construit l'application puis sert deux fois la même page :
+
+    python bench_startup.py --runs 10
+    python bench_startup.py --no-cache --url /login
+    python bench_startup.py --clear-cache --warmup
+
+--clear-cache vide le cache de bytecode avant la première mesure (démarrage
+à froid) ; les suivantes relisent le cache rempli par la première.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+ETAPES = ('import', 'create_app', 'premiere_reponse', 'seconde_reponse', 'processus')
+
+
+def run_child(config_name, url):
+    """Exécuté dans le processus mesuré : affiche les durées de chaque étape en JSON."""
+    debut = time.perf_counter()
+    from hopital import create_app
+    importe = time.perf_counter()
+    app = create_app(config_name)
+    cree = time.perf_counter()
+    client = app.test_client()
+    status = client.get(url).status_code
+    premiere = time.perf_counter()
+    client.get(url)
+    seconde = time.perf_counter()
+    print(json.dumps({
+        'status': status,
+        'import': importe - debut,
+        'create_app': cree - importe,
+        'premiere_reponse': premiere - cree,
+        'seconde_reponse': seconde - premiere,
+    }))
+
+
+def measure(args, env):
+    debut = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, __file__, '--child', '--config', args.config, '--url', args.url],
+        env=env, capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    ).stdout
+    mesure = json.loads(output.strip().splitlines()[-1])
+    mesure['processus'] = time.perf_counter() - debut
+    return mesure
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help="Nombre de processus mesurés.")
+    parser.add_argument('--config', default='testing', help="Configuration de create_app (testing : SQLite en mémoire).")
+    parser.add_argument('--url', default='/login', help="Page servie (sans base de données de préférence).")
+    parser.add_argument('--no-cache', action='store_true', help="Désactive le cache de bytecode Jinja.")
+    parser.add_argument('--warmup', action='store_true', help="Compile tous les templates au démarrage (TEMPLATE_WARMUP).")
+    parser.add_argument('--clear-cache', action='store_true', help="Vide le cache de bytecode avant la première mesure.")
+    parser.add_argument('--json', dest='as_json', action='store_true', help="Sortie JSON.")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.config, args.url)
+        return
+
+    env = dict(os.environ,
+               JINJA_BYTECODE_CACHE='False' if args.no_cache else 'True',
+               TEMPLATE_WARMUP='True' if args.warmup else 'False')
+    if args.clear_cache:
+        from hopital import create_app
+        from hopital.templating import bytecode_cache_dir
+        shutil.rmtree(bytecode_cache_dir(create_app(args.config)), ignore_errors=True)
+
+    mesures = [measure(args, env) for _ in range(args.runs)]
+    resultats = {
+        etape: {
+            'premier_ms': round(mesures[0][etape] * 1000, 1),
+            'mediane_ms': round(statistics.median(m[etape] for m in mesures) * 1000, 1),
+            'min_ms': round(min(m[etape] for m in mesures) * 1000, 1),
+            'max_ms': round(max(m[etape] for m in mesures) * 1000, 1),
+        }
+        for etape in ETAPES
+    }
+    if args.as_json:
+        print(json.dumps({'runs': args.runs, 'url': args.url, 'status': mesures[0]['status'],
+                          'resultats': resultats}, indent=2))
+        return
+
+    print(f"{args.runs} démarrages, GET {args.url} -> {mesures[0]['status']} "
+          f"(cache {'désactivé' if args.no_cache else 'activé'}, warm-up {'oui' if args.warmup else 'non'})")
+    print(f"  {'étape':<18} {'premier':>9} {'médiane':>9} {'min':>9} {'max':>9}")
+    for etape in ETAPES:
+        r = resultats[etape]
+        print(f"  {etape:<18} {r['premier_ms']:>7.1f}ms {r['mediane_ms']:>7.1f}ms {r['min_ms']:>7.1f}ms {r['max_ms']:>7.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,15 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def parse_sites(value):
+    """'paris=mysql+pymysql://...;lyon=mysql+pymysql://...' -> {'paris': '...', 'lyon': '...'}"""
+    sites = {}
+    for item in (value or '').split(';'):
+        if item.strip():
+            key, uri = item.split('=', 1)
+            sites[key.strip()] = uri.strip()
+    return sites
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'votre-cle-secrete-changez-moi'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or f"mysql+pymysql://{os.environ.get('DB_USER', 'root')}:{os.environ.get('DB_PASSWORD', 'Azerty1234')}@{os.environ.get('DB_HOST', 'localhost')}/{os.environ.get('DB_NAME', 'hopital_db')}"
@@ -25,6 +34,47 @@ class Config:
     # Timezone
     TIMEZONE = 'Europe/Paris'
 
+    # Rappels de rendez-vous (tâche planifiée `flask send-reminders`)
+    REMINDER_BACKEND = os.environ.get('REMINDER_BACKEND') or 'file'  # 'file' ou 'smtp'
+    REMINDER_OUTBOX_PATH = os.environ.get('REMINDER_OUTBOX_PATH') or 'instance/reminders_outbox.jsonl'
+    REMINDER_WORKERS = int(os.environ.get('REMINDER_WORKERS') or 16)
+    REMINDER_MAX_RETRIES = int(os.environ.get('REMINDER_MAX_RETRIES') or 3)
+    REMINDER_BATCH_SIZE = int(os.environ.get('REMINDER_BATCH_SIZE') or 500)
+    # Réservation restée « en cours » (exécution interrompue) reprise après ce délai
+    REMINDER_RESERVATION_TIMEOUT = int(os.environ.get('REMINDER_RESERVATION_TIMEOUT') or 30)  # minutes
+    SMTP_HOST = os.environ.get('SMTP_HOST') or 'localhost'
+    SMTP_PORT = int(os.environ.get('SMTP_PORT') or 1025)
+    SMTP_SENDER = os.environ.get('SMTP_SENDER') or 'no-reply@hopital.com'
+
+    # Dossier patient : taille d'une page d'historique
+    DOSSIER_PAGE_SIZE = int(os.environ.get('DOSSIER_PAGE_SIZE') or 20)
+
+    # Rapports mensuels : nombre de lignes chargées par morceau
+    ANALYTICS_CHUNK_SIZE = int(os.environ.get('ANALYTICS_CHUNK_SIZE') or 10000)
+
+    # Grille des disponibilités : taille d'une cellule (diviseur de 60) et plage horaire affichée
+    AVAILABILITY_CELL_MINUTES = int(os.environ.get('AVAILABILITY_CELL_MINUTES') or 5)
+    AVAILABILITY_GRID_START_HOUR = int(os.environ.get('AVAILABILITY_GRID_START_HOUR') or 7)
+    AVAILABILITY_GRID_END_HOUR = int(os.environ.get('AVAILABILITY_GRID_END_HOUR') or 20)
+
+    # Purge des créneaux expirés jamais réservés (tâche planifiée `flask purge-slots`)
+    SLOT_PURGE_AGE_DAYS = int(os.environ.get('SLOT_PURGE_AGE_DAYS') or 30)
+    SLOT_PURGE_BATCH_SIZE = int(os.environ.get('SLOT_PURGE_BATCH_SIZE') or 500)
+    SLOT_PURGE_MAX_ROWS_PER_SECOND = float(os.environ.get('SLOT_PURGE_MAX_ROWS_PER_SECOND') or 2000)  # 0 : sans limite
+
+    # Templates : code compilé conservé sur disque (instance/jinja_cache par défaut)
+    # et compilation de tous les templates au démarrage
+    JINJA_BYTECODE_CACHE = os.environ.get('JINJA_BYTECODE_CACHE', 'True') == 'True'
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR')
+    TEMPLATE_WARMUP = os.environ.get('TEMPLATE_WARMUP') == 'True'
+
+    # Multi-site : le site par défaut utilise SQLALCHEMY_DATABASE_URI, chaque site
+    # supplémentaire sa propre base (SITES_DATABASE_URLS). L'annuaire de connexion
+    # (email -> site) est partagé par tous les sites.
+    DEFAULT_SITE = os.environ.get('DEFAULT_SITE') or 'principal'
+    SITES_DATABASE_URLS = parse_sites(os.environ.get('SITES_DATABASE_URLS'))
+    DIRECTORY_DATABASE_URL = os.environ.get('DIRECTORY_DATABASE_URL')
+
 class DevelopmentConfig(Config):
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = os.environ.get('DEV_DATABASE_URL') or \
@@ -32,6 +82,7 @@ class DevelopmentConfig(Config):
 
 class ProductionConfig(Config):
     DEBUG = False
+    TEMPLATE_WARMUP = os.environ.get('TEMPLATE_WARMUP', 'True') == 'True'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         f"mysql+pymysql://{Config.DB_USER}:{Config.DB_PASSWORD}@{Config.DB_HOST}/{Config.DB_NAME}"
 
@@ -0,0 +1,50 @@
+"""
+Configuration Gunicorn (serveur WSGI prefork) pour la production.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Avec preload_app (par défaut), `kill -HUP <pid du master>` relance les workers à
+partir du code déjà chargé par le master : utile pour la configuration, jamais
+pour une nouvelle version. Mise en production d'un nouveau code sans coupure :
+
+    kill -USR2 <pid du master>     # nouveau master (nouveau code) à côté de l'ancien
+    kill -WINCH <pid de l'ancien>  # arrêt gracieux des anciens workers
+    kill -QUIT <pid de l'ancien>   # une fois le nouveau master validé
+
+Avec GUNICORN_PRELOAD=False, chaque worker importe l'application et HUP recharge le code.
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS') or multiprocessing.cpu_count() * 2 + 1)
+threads = int(os.environ.get('GUNICORN_THREADS') or 2)
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+# L'application est importée une seule fois par le master puis partagée par fork
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True') == 'True'
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT') or 30)
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT') or 30)
+keepalive = 5
+
+# Recyclage périodique des workers (fuites mémoire), décalé pour éviter les redémarrages simultanés
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS') or 2000)
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER') or 200)
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    """Les connexions ouvertes par le master ne doivent pas être partagées entre processus."""
+    if not server.cfg.preload_app:
+        return
+    from hopital.extensions import db
+
+    # Application déjà chargée par le master, quel que soit le module d'entrée
+    app = server.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
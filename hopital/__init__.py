@@ -0,0 +1,38 @@
+"""
+Application de gestion hospitalière.
+"""
+
+import os
+
+from flask import Flask
+
+from config import config
+from .enums import Role, StatutRendezVous, StatutFile, PERSONNEL_ROLES
+from .extensions import db, login_manager
+
+
+def create_app(config_name=None):
+    """Construit l'application pour la configuration donnée (FLASK_ENV ou 'default')."""
+    config_name = config_name or os.environ.get('FLASK_ENV', 'default')
+
+    app = Flask(__name__, static_folder='../static')
+    app.config.from_object(config[config_name])
+
+    from . import models  # Enregistre les modèles auprès de SQLAlchemy
+    from . import events, sites, templating
+
+    sites.configure(app)
+    db.init_app(app)
+    login_manager.init_app(app)
+    from .routes import bp
+    from .commands import register_commands
+
+    events.init_app(app)
+    # Les templates comparent rôles et statuts aux membres des enums, jamais à des libellés
+    app.jinja_env.globals.update(Role=Role, StatutRendezVous=StatutRendezVous, StatutFile=StatutFile,
+                                PERSONNEL_ROLES=PERSONNEL_ROLES)
+    app.register_blueprint(bp)
+    register_commands(app)
+    templating.init_app(app)
+
+    return app
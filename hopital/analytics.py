@@ -0,0 +1,245 @@
+"""
+Rapports mensuels : occupation des créneaux, absences et délai de prise de rendez-vous.
+
+Les colonnes utiles sont chargées en bloc, par morceaux (curseur en flux), dans des
+tableaux NumPy ; les regroupements sont vectorisés (np.unique + np.bincount). Le
+rapport d'un mois clos est figé dans RapportMensuel, le mois en cours est recalculé.
+"""
+
+import json
+from datetime import datetime, date, timedelta
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from .enums import Role, StatutRendezVous, StatutFile
+from .extensions import db
+from .models import User, Salle, Creneau, RendezVous, FileAttente, RapportMensuel
+
+JOURS = ('Lun', 'Mar', 'Mer', 'Jeu', 'Ven', 'Sam', 'Dim')
+SANS_SPECIALITE = 'Non spécifiée'
+
+
+def parse_month(value):
+    """'AAAA-MM' -> date du premier jour du mois (ValueError si invalide)."""
+    return datetime.strptime(value, '%Y-%m').date()
+
+
+def previous_month(today=None):
+    return ((today or date.today()).replace(day=1) - timedelta(days=1)).replace(day=1)
+
+
+def _next_month(mois):
+    return (mois.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+# Chargement en colonnes
+def _int_column(values):
+    return np.array(values, dtype=np.int64)
+
+
+def _date_column(values):
+    return np.array(values, dtype='datetime64[D]')
+
+
+def _datetime_column(values):
+    return np.array(values, dtype='datetime64[s]')
+
+
+def _time_column(values):
+    """Heures -> secondes depuis minuit."""
+    return np.fromiter((t.hour * 3600 + t.minute * 60 + t.second for t in values), dtype=np.int64, count=len(values))
+
+
+def _load_columns(stmt, converters, chunk_size):
+    """Exécute stmt en flux et retourne un tableau NumPy par colonne, construit morceau par morceau."""
+    chunks = [[] for _ in converters]
+    result = db.session.execute(stmt.execution_options(stream_results=True, yield_per=chunk_size))
+    for partition in result.partitions():
+        for values, convert, column_chunks in zip(zip(*partition), converters, chunks):
+            column_chunks.append(convert(values))
+    return [np.concatenate(column_chunks) if column_chunks else convert(())
+            for column_chunks, convert in zip(chunks, converters)]
+
+
+# Agrégats vectorisés
+def _count_by(keys, flags):
+    """Regroupe par clé : (clés uniques, effectifs, somme des drapeaux) ; flags peut être un effectif."""
+    uniques, inverse = np.unique(keys, return_inverse=True)
+    totals = np.bincount(inverse, minlength=len(uniques))
+    hits = np.bincount(inverse, weights=flags, minlength=len(uniques)).astype(np.int64)
+    return uniques, totals, hits
+
+
+def _rate(hits, total):
+    return round(100 * float(hits) / float(total), 1) if total else None
+
+
+def _weekdays(days):
+    """Jour de la semaine (lundi = 0) ; le 01/01/1970 était un jeudi."""
+    return (days.astype(np.int64) + 3) % 7
+
+
+def _doctors():
+    """Dimension médecins : {id: (nom affiché, spécialité, salle_id)}."""
+    return {
+        medecin_id: (f"Dr. {prenom} {nom}", specialite or SANS_SPECIALITE, salle_id)
+        for medecin_id, prenom, nom, specialite, salle_id in db.session.execute(
+            select(User.id, User.prenom, User.nom, User.specialite, User.salle_id).where(User.role == Role.MEDECIN)
+        )
+    }
+
+
+def _unknown_doctor(medecin_id):
+    # Utilisateur qui n'est plus médecin : ses données restent comptées
+    return (f"Médecin #{medecin_id}", SANS_SPECIALITE, None)
+
+
+def _utilization(debut, fin, medecins, chunk_size):
+    """Occupation des créneaux du mois par médecin puis par salle (salle actuelle du médecin)."""
+    medecin_ids, reserves = _load_columns(
+        select(Creneau.medecin_id, db.case((Creneau.disponible == False, 1), else_=0)).where(
+            Creneau.date >= debut, Creneau.date < fin
+        ), (_int_column, _int_column), chunk_size)
+    ids, totals, hits = _count_by(medecin_ids, reserves)
+
+    par_medecin, salle_of_doctor = [], np.zeros(len(ids), dtype=np.int64)
+    for position, (i, t, h) in enumerate(zip(ids, totals, hits)):
+        nom, specialite, salle_id = medecins.get(int(i), _unknown_doctor(i))
+        par_medecin.append({'medecin': nom, 'specialite': specialite,
+                            'creneaux': int(t), 'reserves': int(h), 'taux': _rate(h, t)})
+        salle_of_doctor[position] = salle_id or 0
+
+    # Les effectifs par médecin sont regroupés par salle
+    salle_ids, _, salle_hits = _count_by(salle_of_doctor, hits)
+    _, _, salle_totals = _count_by(salle_of_doctor, totals)
+    numeros = dict(db.session.execute(select(Salle.id, Salle.numero)).all())
+    par_salle = [
+        {'salle': numeros.get(int(s), 'Sans salle') if s else 'Sans salle',
+         'creneaux': int(t), 'reserves': int(h), 'taux': _rate(h, t)}
+        for s, t, h in zip(salle_ids, salle_totals, salle_hits)
+    ]
+
+    return {
+        'par_medecin': sorted(par_medecin, key=lambda r: r['medecin']),
+        'par_salle': sorted(par_salle, key=lambda r: r['salle']),
+        'creneaux': int(totals.sum()),
+        'reserves': int(hits.sum()),
+        'taux': _rate(hits.sum(), totals.sum()),
+    }
+
+
+def _specialty_codes(medecin_ids, medecins, specialites):
+    """Code de spécialité (indice dans `specialites`) de chaque ligne, via les médecins distincts."""
+    ids, inverse = np.unique(medecin_ids, return_inverse=True)
+    index = {specialite: code for code, specialite in enumerate(specialites)}
+    codes = np.array([index[medecins.get(int(i), _unknown_doctor(i))[1]] for i in ids], dtype=np.int64)
+    return codes[inverse]
+
+
+def _no_shows(debut, fin, medecins, specialites, chunk_size):
+    """Taux d'absence des patients passés en file d'attente, par spécialité et jour de la semaine."""
+    medecin_ids, jours, absents = _load_columns(
+        select(FileAttente.medecin_id, FileAttente.date,
+               db.case((FileAttente.statut_file == StatutFile.ABSENT, 1), else_=0)).where(
+            FileAttente.date >= debut, FileAttente.date < fin,
+            FileAttente.statut_file.in_([StatutFile.TERMINE, StatutFile.ABSENT])
+        ), (_int_column, _date_column, _int_column), chunk_size)
+
+    # Matrice spécialité x jour de la semaine en un seul bincount sur une clé combinée
+    keys = _specialty_codes(medecin_ids, medecins, specialites) * 7 + _weekdays(jours)
+    size = len(specialites) * 7
+    totals = np.bincount(keys, minlength=size).reshape(-1, 7)
+    hits = np.bincount(keys, weights=absents, minlength=size).astype(np.int64).reshape(-1, 7)
+
+    spec_totals, spec_hits = totals.sum(axis=1), hits.sum(axis=1)
+    day_totals, day_hits = totals.sum(axis=0), hits.sum(axis=0)
+    return {
+        'jours': list(JOURS),
+        'par_specialite': [
+            {'specialite': specialite,
+             'passages': int(spec_totals[code]), 'absences': int(spec_hits[code]),
+             'taux': _rate(spec_hits[code], spec_totals[code]),
+             'taux_par_jour': [_rate(h, t) for h, t in zip(hits[code], totals[code])]}
+            for code, specialite in enumerate(specialites) if spec_totals[code]
+        ],
+        'taux_par_jour': [_rate(h, t) for h, t in zip(day_hits, day_totals)],
+        'passages': int(totals.sum()),
+        'absences': int(hits.sum()),
+        'taux': _rate(hits.sum(), totals.sum()),
+    }
+
+
+def _lead_summary(jours):
+    if not len(jours):
+        return {'rendez_vous': 0, 'moyenne_jours': None, 'mediane_jours': None, 'p90_jours': None}
+    mediane, p90 = np.percentile(jours, [50, 90])
+    return {'rendez_vous': int(len(jours)), 'moyenne_jours': round(float(jours.mean()), 1),
+            'mediane_jours': round(float(mediane), 1), 'p90_jours': round(float(p90), 1)}
+
+
+def _lead_times(debut, fin, medecins, specialites, chunk_size):
+    """Délai entre la prise de rendez-vous et le rendez-vous (rendez-vous non annulés du mois)."""
+    medecin_ids, jours, heures, crees = _load_columns(
+        select(RendezVous.medecin_id, RendezVous.date, RendezVous.heure, RendezVous.created_at).where(
+            RendezVous.date >= debut, RendezVous.date < fin, RendezVous.statut != StatutRendezVous.ANNULE
+        ), (_int_column, _date_column, _time_column, _datetime_column), chunk_size)
+
+    known = ~np.isnat(crees)
+    rendez_vous = jours[known].astype('datetime64[s]').astype(np.int64) + heures[known]
+    delais = np.clip(rendez_vous - crees[known].astype(np.int64), 0, None) / 86400.0
+    codes = _specialty_codes(medecin_ids[known], medecins, specialites)
+
+    # Tri par (spécialité, délai) puis découpage aux changements de spécialité
+    order = np.lexsort((delais, codes))
+    codes, delais = codes[order], delais[order]
+    groups, starts = np.unique(codes, return_index=True)
+    par_specialite = [
+        dict(specialite=specialites[int(code)], **_lead_summary(groupe))
+        for code, groupe in zip(groups, np.split(delais, starts[1:]))
+    ]
+    return dict(par_specialite=par_specialite, **_lead_summary(delais))
+
+
+def compute_monthly_report(mois):
+    """Calcule le rapport du mois (date du premier jour) ; toutes les valeurs sont sérialisables en JSON."""
+    chunk_size = current_app.config['ANALYTICS_CHUNK_SIZE']
+    debut, fin = mois, _next_month(mois)
+    medecins = _doctors()
+    specialites = sorted({specialite for _, specialite, _ in medecins.values()} | {SANS_SPECIALITE})
+    return {
+        'mois': mois.strftime('%Y-%m'),
+        'occupation': _utilization(debut, fin, medecins, chunk_size),
+        'absences': _no_shows(debut, fin, medecins, specialites, chunk_size),
+        'delais': _lead_times(debut, fin, medecins, specialites, chunk_size),
+        'calcule_at': datetime.utcnow().isoformat(timespec='seconds'),
+    }
+
+
+def monthly_report(mois, refresh=False):
+    """
+    Rapport du mois. Un mois clos est lu depuis RapportMensuel (calculé et stocké au
+    premier accès, ou recalculé avec refresh=True) ; le mois en cours n'est jamais stocké.
+
+    refresh=True perd de l'information une fois le mois purgé (flask purge-slots) :
+    les créneaux libres supprimés manquent au dénominateur de l'occupation.
+    """
+    cle = mois.strftime('%Y-%m')
+    clos = mois < date.today().replace(day=1)
+    if clos and not refresh:
+        cached = RapportMensuel.query.get(cle)
+        if cached is not None:
+            return json.loads(cached.contenu)
+
+    rapport = compute_monthly_report(mois)
+    if clos:
+        db.session.merge(RapportMensuel(mois=cle, contenu=json.dumps(rapport, ensure_ascii=False),
+                                        calcule_at=datetime.utcnow()))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Stocké en parallèle par une autre requête : le contenu est équivalent
+            db.session.rollback()
+    return rapport
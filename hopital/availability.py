@@ -0,0 +1,135 @@
+"""
+Disponibilités du jour des médecins et des salles, en bitsets.
+
+La journée est découpée en cellules de AVAILABILITY_CELL_MINUTES minutes. Chaque
+médecin a deux lignes de bits (cellules couvertes par ses créneaux, cellules
+réservées) et chaque salle une ligne d'occupation : le OU des réservations des
+médecins qui y sont affectés. Les lignes sont empaquetées (np.packbits) en matrices,
+une recherche "libre entre X et Y" est un ET bit à bit sur toutes les lignes à la fois.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import select
+
+from .enums import Role
+from .extensions import db
+from .models import User, Salle, Creneau
+
+MedecinLibre = namedtuple('MedecinLibre', ['id', 'nom', 'specialite', 'salle_numero'])
+SalleLibre = namedtuple('SalleLibre', ['id', 'numero', 'nom'])
+# Ligne de la grille : une lettre par cellule ('L' libre, 'R' réservé, 'O' occupée, 'X' hors service, '' rien)
+GridRow = namedtuple('GridRow', ['id', 'nom', 'detail', 'cellules'])
+
+MINUTES_PAR_JOUR = 24 * 60
+
+
+def _minutes(t):
+    return t.hour * 60 + t.minute
+
+
+def _cover(n_rows, rows, starts, ends, n_cells):
+    """Matrice empaquetée (n_rows x n_cells bits) des intervalles de cellules [start, end) de chaque ligne."""
+    valid = starts < ends
+    diff = np.zeros((n_rows, n_cells + 1), dtype=np.int32)
+    np.add.at(diff, (rows[valid], starts[valid]), 1)
+    np.add.at(diff, (rows[valid], ends[valid]), -1)
+    return np.packbits(diff.cumsum(axis=1)[:, :n_cells] > 0, axis=1)
+
+
+class DayAvailability:
+    """Bitsets d'une journée ; construit par day_availability(jour)."""
+
+    def __init__(self, jour, cell_minutes, medecins, salles, slots, booked, salle_index):
+        self.jour = jour
+        self.cell_minutes = cell_minutes
+        self.n_cells = MINUTES_PAR_JOUR // cell_minutes
+        self.medecins = medecins  # [(id, nom, specialite, salle_id, salle_numero)]
+        self.salles = salles      # [(id, numero, nom, disponible)]
+        self.slots = slots
+        self.booked = booked
+        self.free = slots & ~booked
+
+        # Occupation des salles : OU des réservations des médecins affectés à chaque salle
+        self.occupied = np.zeros((len(salles), booked.shape[1]), dtype=np.uint8)
+        assigned = salle_index >= 0
+        np.bitwise_or.at(self.occupied, salle_index[assigned], booked[assigned])
+        self.in_service = np.array([bool(disponible) for _, _, _, disponible in salles], dtype=bool)
+
+    def _cells(self, debut, fin):
+        """Cellules [a, b) couvrant entièrement l'intervalle horaire [debut, fin)."""
+        return _minutes(debut) // self.cell_minutes, -(-_minutes(fin) // self.cell_minutes)
+
+    def mask(self, debut, fin):
+        a, b = self._cells(debut, fin)
+        bits = np.zeros(self.n_cells, dtype=bool)
+        bits[a:b] = True
+        return np.packbits(bits)
+
+    def free_doctors(self, debut, fin):
+        """Médecins dont les créneaux libres couvrent tout [debut, fin)."""
+        mask = self.mask(debut, fin)
+        libres = np.all((self.free & mask) == mask, axis=1)
+        return [MedecinLibre(m[0], m[1], m[2], m[4]) for m, libre in zip(self.medecins, libres) if libre]
+
+    def free_rooms(self, debut, fin):
+        """Salles en service sans consultation réservée sur [debut, fin)."""
+        mask = self.mask(debut, fin)
+        libres = np.all((self.occupied & mask) == 0, axis=1) & self.in_service
+        return [SalleLibre(s[0], s[1], s[2]) for s, libre in zip(self.salles, libres) if libre]
+
+    def _window(self, packed, debut, fin):
+        a, b = self._cells(debut, fin)
+        return np.unpackbits(packed, axis=1, count=self.n_cells)[:, a:b].astype(bool)
+
+    def doctor_grid(self, debut, fin):
+        slots = self._window(self.slots, debut, fin)
+        booked = self._window(self.booked, debut, fin)
+        states = np.where(booked, 'R', np.where(slots, 'L', ''))
+        return [GridRow(m[0], m[1], m[2], list(row)) for m, row in zip(self.medecins, states)]
+
+    def room_grid(self, debut, fin):
+        occupied = self._window(self.occupied, debut, fin)
+        states = np.where(occupied, 'O', 'L')
+        states[~self.in_service] = 'X'
+        return [GridRow(s[0], s[1], s[2], list(row)) for s, row in zip(self.salles, states)]
+
+
+def day_availability(jour):
+    """Charge les créneaux du jour en une requête et construit les bitsets de tous les médecins et salles."""
+    cell = current_app.config['AVAILABILITY_CELL_MINUTES']
+    n_cells = MINUTES_PAR_JOUR // cell
+
+    salles = db.session.execute(
+        select(Salle.id, Salle.numero, Salle.nom, Salle.disponible).order_by(Salle.numero)
+    ).all()
+    salle_position = {salle[0]: position for position, salle in enumerate(salles)}
+    numeros = {salle[0]: salle[1] for salle in salles}
+    medecins = [
+        (medecin_id, f"Dr. {nom} {prenom}", specialite, salle_id, numeros.get(salle_id))
+        for medecin_id, nom, prenom, specialite, salle_id in db.session.execute(
+            select(User.id, User.nom, User.prenom, User.specialite, User.salle_id)
+            .where(User.role == Role.MEDECIN).order_by(User.nom, User.prenom)
+        )
+    ]
+    medecin_position = {m[0]: position for position, m in enumerate(medecins)}
+    salle_index = np.array([salle_position.get(m[3], -1) for m in medecins], dtype=np.int64)
+
+    creneaux = [
+        (medecin_position[medecin_id], _minutes(debut), _minutes(fin), disponible == False)
+        for medecin_id, debut, fin, disponible in db.session.execute(
+            select(Creneau.medecin_id, Creneau.heure_debut, Creneau.heure_fin, Creneau.disponible)
+            .where(Creneau.date == jour)
+        )
+        if medecin_id in medecin_position
+    ]
+    rows, starts, ends, reserves = (np.array(column, dtype=np.int64) for column in zip(*creneaux)) \
+        if creneaux else (np.zeros(0, dtype=np.int64),) * 4
+    reserves = reserves.astype(bool)
+
+    # Libre : seulement les cellules entièrement couvertes ; réservé : toute cellule entamée
+    slots = _cover(len(medecins), rows, -(-starts // cell), ends // cell, n_cells)
+    booked = _cover(len(medecins), rows[reserves], starts[reserves] // cell, -(-ends[reserves] // cell), n_cells)
+    return DayAvailability(jour, cell, medecins, salles, slots, booked, salle_index)
@@ -0,0 +1,156 @@
+"""
+Opérations groupées du secrétariat.
+
+Chaque opération s'exécute en requêtes UPDATE ensemblistes dans une seule
+transaction et retourne le nombre de lignes affectées par table. Les UPDATE
+ensemblistes ne déclenchent pas le flush : les événements du flux de
+changements sont publiés explicitement avant les mises à jour.
+"""
+
+from . import events
+from .enums import StatutRendezVous, StatutFile
+from .extensions import db
+from .models import Creneau, RendezVous, FileAttente, invalidate_dossier_resume
+
+# Transitions de file d'attente acceptées par apply_queue_transitions : statut cible -> statuts de départ
+QUEUE_TRANSITIONS = {
+    StatutFile.EN_CONSULTATION: (StatutFile.EN_ATTENTE,),
+    StatutFile.TERMINE: (StatutFile.EN_CONSULTATION,),
+    StatutFile.ABSENT: (StatutFile.EN_ATTENTE,),
+}
+
+
+def _publish_slots_released(creneau_ids):
+    events.emit_many(db.session, events.SLOT_RELEASED, (
+        (slot_id, {'medecin_id': medecin_id, 'date': jour})
+        for slot_id, medecin_id, jour in db.session.query(Creneau.id, Creneau.medecin_id, Creneau.date).filter(
+            Creneau.id.in_(creneau_ids), Creneau.disponible == False)
+    ))
+
+
+def _publish_queue_changes(file_filter, nouveau):
+    events.emit_many(db.session, events.QUEUE_STATUS_CHANGED, (
+        (fa_id, {'medecin_id': medecin_id, 'patient_id': patient_id, 'date': jour,
+                 'ancien': ancien.literal, 'nouveau': nouveau.literal})
+        for fa_id, medecin_id, patient_id, jour, ancien in db.session.query(
+            FileAttente.id, FileAttente.medecin_id, FileAttente.patient_id, FileAttente.date, FileAttente.statut_file
+        ).filter(*file_filter)
+        if ancien != nouveau
+    ))
+
+
+def _commit(summary):
+    try:
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return summary
+
+
+def cancel_doctor_appointments(medecin_id, date_debut, date_fin):
+    """Annule les rendez-vous confirmés d'un médecin sur une période et libère leurs créneaux."""
+    rdv_ids = db.session.query(RendezVous.id).filter(
+        RendezVous.medecin_id == medecin_id,
+        RendezVous.date >= date_debut,
+        RendezVous.date <= date_fin,
+        RendezVous.statut == StatutRendezVous.CONFIRME
+    )
+    creneau_ids = db.session.query(RendezVous.creneau_id).filter(RendezVous.id.in_(rdv_ids))
+    invalidate_dossier_resume(db.session.query(RendezVous.patient_id).filter(RendezVous.id.in_(rdv_ids)))
+
+    _publish_slots_released(creneau_ids)
+    _publish_queue_changes([FileAttente.rendez_vous_id.in_(rdv_ids), FileAttente.statut_file == StatutFile.EN_ATTENTE], StatutFile.ANNULE)
+    events.emit_many(db.session, events.APPOINTMENT_CANCELLED, (
+        (rv_id, {'patient_id': patient_id, 'medecin_id': medecin_id, 'creneau_id': creneau_id, 'date': jour})
+        for rv_id, patient_id, creneau_id, jour in db.session.query(
+            RendezVous.id, RendezVous.patient_id, RendezVous.creneau_id, RendezVous.date
+        ).filter(RendezVous.id.in_(rdv_ids))
+    ))
+
+    # Les sous-requêtes dépendent du statut Confirmé : les rendez-vous sont mis à jour en dernier
+    summary = {
+        'creneaux_liberes': Creneau.query.filter(Creneau.id.in_(creneau_ids), Creneau.disponible == False).update(
+            {Creneau.disponible: True}, synchronize_session=False),
+        'file_attente_annulee': FileAttente.query.filter(
+            FileAttente.rendez_vous_id.in_(rdv_ids),
+            FileAttente.statut_file == StatutFile.EN_ATTENTE
+        ).update({FileAttente.statut_file: StatutFile.ANNULE}, synchronize_session=False),
+        'rendez_vous_annules': RendezVous.query.filter(
+            RendezVous.medecin_id == medecin_id,
+            RendezVous.date >= date_debut,
+            RendezVous.date <= date_fin,
+            RendezVous.statut == StatutRendezVous.CONFIRME
+        ).update({RendezVous.statut: StatutRendezVous.ANNULE}, synchronize_session=False),
+    }
+    return _commit(summary)
+
+
+def mark_remaining_absent(jour):
+    """Marque absents tous les patients encore en attente pour la journée et libère leurs créneaux."""
+    en_attente = db.session.query(FileAttente.rendez_vous_id).filter(
+        FileAttente.date == jour,
+        FileAttente.statut_file == StatutFile.EN_ATTENTE
+    )
+    creneau_ids = db.session.query(RendezVous.creneau_id).filter(RendezVous.id.in_(en_attente))
+    invalidate_dossier_resume(db.session.query(FileAttente.patient_id).filter(
+        FileAttente.date == jour,
+        FileAttente.statut_file == StatutFile.EN_ATTENTE
+    ))
+
+    _publish_slots_released(creneau_ids)
+    _publish_queue_changes([FileAttente.date == jour, FileAttente.statut_file == StatutFile.EN_ATTENTE], StatutFile.ABSENT)
+
+    summary = {
+        'creneaux_liberes': Creneau.query.filter(Creneau.id.in_(creneau_ids), Creneau.disponible == False).update(
+            {Creneau.disponible: True}, synchronize_session=False),
+        'patients_absents': FileAttente.query.filter(
+            FileAttente.date == jour,
+            FileAttente.statut_file == StatutFile.EN_ATTENTE
+        ).update({FileAttente.statut_file: StatutFile.ABSENT}, synchronize_session=False),
+    }
+    return _commit(summary)
+
+
+def apply_queue_transitions(transitions):
+    """
+    Applique une liste de transitions [(file_id, statut), ...] de la file d'attente.
+
+    Les transitions sont regroupées par statut cible. Seules les entrées dans un
+    statut de départ autorisé (QUEUE_TRANSITIONS) changent, les autres sont ignorées ;
+    les rendez-vous (Terminé) et créneaux (Absent) associés ne sont mis à jour que
+    pour les entrées effectivement modifiées.
+    """
+    par_statut = {}
+    for file_id, statut in transitions:
+        statut = StatutFile.coerce(statut)
+        if statut not in QUEUE_TRANSITIONS:
+            raise ValueError(f"Transition de file d'attente invalide : {statut}")
+        par_statut.setdefault(statut, set()).add(int(file_id))
+
+    summary = {'file_attente': {}, 'rendez_vous_termines': 0, 'creneaux_liberes': 0}
+    for statut, file_ids in par_statut.items():
+        depart = FileAttente.statut_file.in_(QUEUE_TRANSITIONS[statut])
+        # Entrées verrouillées jusqu'au commit : les mises à jour suivantes portent sur cet ensemble
+        changed_ids = [fa_id for fa_id, in db.session.query(FileAttente.id).filter(
+            FileAttente.id.in_(file_ids), depart).with_for_update()]
+        if not changed_ids:
+            summary['file_attente'][statut.label] = 0
+            continue
+        rdv_ids = db.session.query(FileAttente.rendez_vous_id).filter(FileAttente.id.in_(changed_ids))
+        invalidate_dossier_resume(db.session.query(FileAttente.patient_id).filter(FileAttente.id.in_(changed_ids)))
+        if statut == StatutFile.TERMINE:
+            summary['rendez_vous_termines'] += RendezVous.query.filter(
+                RendezVous.id.in_(rdv_ids), RendezVous.statut == StatutRendezVous.CONFIRME
+            ).update({RendezVous.statut: StatutRendezVous.TERMINE}, synchronize_session=False)
+        elif statut == StatutFile.ABSENT:
+            creneau_ids = db.session.query(RendezVous.creneau_id).filter(
+                RendezVous.id.in_(rdv_ids), RendezVous.statut == StatutRendezVous.CONFIRME)
+            _publish_slots_released(creneau_ids)
+            summary['creneaux_liberes'] += Creneau.query.filter(
+                Creneau.id.in_(creneau_ids), Creneau.disponible == False
+            ).update({Creneau.disponible: True}, synchronize_session=False)
+        _publish_queue_changes([FileAttente.id.in_(changed_ids)], statut)
+        summary['file_attente'][statut.label] = FileAttente.query.filter(FileAttente.id.in_(changed_ids), depart).update(
+            {FileAttente.statut_file: statut}, synchronize_session=False)
+    return _commit(summary)
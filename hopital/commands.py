@@ -0,0 +1,187 @@
+"""
+Commandes CLI (tâches planifiées, jamais exécutées dans une requête web).
+
+Les modules propres à une commande (NumPy, smtplib...) sont importés dans la
+commande : chaque démarrage de worker web enregistre les commandes sans les charger.
+"""
+
+import json
+from datetime import datetime, date, timedelta
+
+import click
+from flask import current_app
+
+from . import events, sites, templating
+
+
+@click.command('send-reminders')
+@click.option('--date', 'jour', default=None, help="Date des rendez-vous (AAAA-MM-JJ), demain par défaut.")
+@click.option('--backend', default=None, help="Canal d'envoi : 'file' ou 'smtp'.")
+@click.option('--workers', type=int, default=None, help="Nombre de workers d'envoi concurrents.")
+@click.option('--site', 'site_list', multiple=True, help="Site à traiter (répétable), tous les sites par défaut.")
+def send_reminders_command(jour, backend, workers, site_list):
+    """Envoie les rappels des rendez-vous confirmés du lendemain."""
+    from .reminders import send_reminders
+
+    jour = datetime.strptime(jour, '%Y-%m-%d').date() if jour else date.today() + timedelta(days=1)
+    for site in site_list or sites.site_keys():
+        with sites.use_site(site):
+            stats = send_reminders(jour, backend=backend, workers=workers)
+        click.echo(f"[{site}] Rappels du {jour.strftime('%d/%m/%Y')} : {stats['envoyes']} envoyés, "
+                   f"{stats['echecs']} en échec, {stats['reserves']} réservés sur {stats['selectionnes']} sélectionnés "
+                   f"en {stats['duree']:.1f}s")
+
+
+@click.command('replay-events')
+@click.option('--after', 'after_id', type=int, default=0, help="Rejoue les événements d'id strictement supérieur.")
+@click.option('--type', 'event_types', multiple=True, type=click.Choice(events.EVENT_TYPES), help="Filtre par type (répétable).")
+@click.option('--site', default=None, help="Site dont le journal est rejoué, site par défaut sinon.")
+def replay_events_command(after_id, event_types, site):
+    """Rejoue le journal des événements métier (une ligne JSON par événement)."""
+    if site:
+        sites.set_current_site(site)
+    for event_id, evt in events.replay(after_id, event_types or None):
+        click.echo(json.dumps({
+            'id': event_id,
+            'type': evt.type,
+            'entite_id': evt.entite_id,
+            'payload': evt.payload,
+            'created_at': evt.created_at.isoformat(),
+        }, ensure_ascii=False))
+
+
+def _taux(valeur):
+    return f"{valeur:.1f} %" if valeur is not None else '-'
+
+
+def _echo_monthly_report(rapport):
+    occupation, absences, delais = rapport['occupation'], rapport['absences'], rapport['delais']
+    click.echo(f"Rapport {rapport['mois']} (calculé le {rapport['calcule_at']})")
+    click.echo(f"\nOccupation des créneaux : {_taux(occupation['taux'])} "
+               f"({occupation['reserves']}/{occupation['creneaux']})")
+    for ligne in occupation['par_medecin']:
+        click.echo(f"  {ligne['medecin']:<30} {ligne['reserves']:>6}/{ligne['creneaux']:<6} {_taux(ligne['taux']):>8}")
+    for ligne in occupation['par_salle']:
+        click.echo(f"  {ligne['salle']:<30} {ligne['reserves']:>6}/{ligne['creneaux']:<6} {_taux(ligne['taux']):>8}")
+    click.echo(f"\nTaux d'absence : {_taux(absences['taux'])} ({absences['absences']}/{absences['passages']})")
+    click.echo(f"  {'':<30} " + ' '.join(f"{jour:>7}" for jour in absences['jours']))
+    for ligne in absences['par_specialite']:
+        click.echo(f"  {ligne['specialite']:<30} " + ' '.join(f"{_taux(t):>7}" for t in ligne['taux_par_jour']))
+    click.echo(f"\nDélai de prise de rendez-vous : médiane {delais['mediane_jours']} j, "
+               f"moyenne {delais['moyenne_jours']} j, p90 {delais['p90_jours']} j ({delais['rendez_vous']} rendez-vous)")
+    for ligne in delais['par_specialite']:
+        click.echo(f"  {ligne['specialite']:<30} médiane {ligne['mediane_jours']} j, p90 {ligne['p90_jours']} j")
+
+
+@click.command('monthly-report')
+@click.option('--month', 'mois', default=None, help="Mois du rapport (AAAA-MM), mois précédent par défaut.")
+@click.option('--refresh', is_flag=True, help="Recalcule un mois clos déjà en cache (occupation faussée si ses créneaux ont été purgés).")
+@click.option('--json', 'as_json', is_flag=True, help="Sortie JSON.")
+@click.option('--site', default=None, help="Site du rapport, site par défaut sinon.")
+def monthly_report_command(mois, refresh, as_json, site):
+    """Rapport mensuel : occupation des créneaux, absences et délais de rendez-vous."""
+    from . import analytics
+
+    mois = analytics.parse_month(mois) if mois else analytics.previous_month()
+    if site:
+        sites.set_current_site(site)
+    rapport = analytics.monthly_report(mois, refresh=refresh)
+    if as_json:
+        click.echo(json.dumps(rapport, ensure_ascii=False, indent=2))
+    else:
+        _echo_monthly_report(rapport)
+
+
+@click.command('migrate-enums')
+@click.option('--site', 'site_list', multiple=True, help="Site à migrer (répétable), tous les sites par défaut.")
+@click.option('--batch-size', type=int, default=1000, show_default=True, help="Lignes converties par transaction.")
+def migrate_enums_command(site_list, batch_size):
+    """Convertit rôles et statuts texte en codes entiers (SMALLINT), par lots."""
+    from .migrations import migrate_enum_columns
+
+    for site in site_list or sites.site_keys():
+        click.echo(f"[{site}]")
+        migrated = migrate_enum_columns(sites.site_engine(site), batch_size=batch_size, echo=click.echo)
+        click.echo(f"[{site}] {len(migrated)} colonne(s) migrée(s)")
+
+
+@click.command('migrate-schema')
+@click.option('--site', 'site_list', multiple=True, help="Site à migrer (répétable), tous les sites par défaut.")
+@click.option('--batch-size', type=int, default=1000, show_default=True, help="Lignes remplies par transaction.")
+def migrate_schema_command(site_list, batch_size):
+    """Met à niveau une base existante : tables, colonnes et index manquants, puis annuaire."""
+    from .migrations import add_missing_columns, create_missing_indexes
+
+    sites.create_all()
+    for site in site_list or sites.site_keys():
+        click.echo(f"[{site}]")
+        engine = sites.site_engine(site)
+        migrated = add_missing_columns(engine, site, batch_size=batch_size, echo=click.echo)
+        created = create_missing_indexes(engine, echo=click.echo)
+        click.echo(f"[{site}] {len(migrated)} colonne(s) ajoutée(s) ou complétée(s), {len(created)} index créé(s)")
+        click.echo(f"[{site}] {sites.sync_directory(site)} utilisateurs dans l'annuaire")
+
+
+@click.command('sync-directory')
+@click.option('--site', 'site_list', multiple=True, help="Site à resynchroniser (répétable), tous les sites par défaut.")
+def sync_directory_command(site_list):
+    """Reconstruit l'annuaire de connexion (email -> site) à partir des bases des sites."""
+    for site in site_list or sites.site_keys():
+        click.echo(f"[{site}] {sites.sync_directory(site)} utilisateurs dans l'annuaire")
+
+
+def _octets(value):
+    if value is None:
+        return 'inconnu'
+    for unite in ('o', 'Ko', 'Mo'):
+        if abs(value) < 1024:
+            return f"{value:.0f} {unite}" if unite == 'o' else f"{value:.1f} {unite}"
+        value /= 1024
+    return f"{value:.1f} Go"
+
+
+@click.command('purge-slots')
+@click.option('--older-than', 'older_than_days', type=int, default=None, help="Âge minimal en jours (SLOT_PURGE_AGE_DAYS par défaut).")
+@click.option('--batch-size', type=int, default=None, help="Créneaux supprimés par transaction.")
+@click.option('--max-rate', 'max_rows_per_second', type=float, default=None, help="Suppressions par seconde au plus (0 : sans limite).")
+@click.option('--dry-run', is_flag=True, help="Compte les créneaux purgeables sans rien supprimer.")
+@click.option('--site', 'site_list', multiple=True, help="Site à purger (répétable), tous les sites par défaut.")
+def purge_slots_command(older_than_days, batch_size, max_rows_per_second, dry_run, site_list):
+    """Supprime par lots les créneaux passés jamais réservés."""
+    from .slot_purge import purge_expired_slots
+
+    for site in site_list or sites.site_keys():
+        with sites.use_site(site):
+            stats = purge_expired_slots(older_than_days, batch_size, max_rows_per_second, dry_run=dry_run)
+        limite = stats['date_limite'].strftime('%d/%m/%Y')
+        estime = f"~{_octets(stats['octets_estimes'])} estimés sur {_octets(stats['octets_table'])}"
+        if dry_run:
+            click.echo(f"[{site}] Simulation : {stats['supprimes']} créneaux libres antérieurs au {limite} "
+                       f"seraient supprimés ({estime})")
+        else:
+            click.echo(f"[{site}] {stats['supprimes']} créneaux libres antérieurs au {limite} supprimés "
+                       f"en {stats['lots']} lots et {stats['duree']:.1f}s ; espace libéré : "
+                       f"{_octets(stats['octets_liberes'])} mesurés, {estime}")
+        if stats['mois_sans_rapport']:
+            click.echo(f"[{site}] Créneaux conservés, rapport mensuel non figé : {', '.join(stats['mois_sans_rapport'])} "
+                       f"(flask monthly-report --month AAAA-MM --site {site})")
+
+
+@click.command('compile-templates')
+def compile_templates_command():
+    """Compile tous les templates et remplit le cache de bytecode (étape de déploiement)."""
+    app = current_app._get_current_object()
+    total = templating.warm_up(app)
+    cache = templating.bytecode_cache_dir(app) if app.config['JINJA_BYTECODE_CACHE'] else 'désactivé'
+    click.echo(f"{total} templates compilés (cache : {cache})")
+
+
+def register_commands(app):
+    app.cli.add_command(send_reminders_command)
+    app.cli.add_command(replay_events_command)
+    app.cli.add_command(sync_directory_command)
+    app.cli.add_command(monthly_report_command)
+    app.cli.add_command(migrate_enums_command)
+    app.cli.add_command(migrate_schema_command)
+    app.cli.add_command(purge_slots_command)
+    app.cli.add_command(compile_templates_command)
@@ -0,0 +1,121 @@
+"""
+Dossier patient : résumé précalculé et historique paginé par clé.
+"""
+
+from collections import namedtuple
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError
+
+from .enums import StatutRendezVous, StatutFile
+from .extensions import db
+from .models import User, RendezVous, FileAttente, DossierResume
+
+HistoriqueRow = namedtuple('HistoriqueRow', ['id', 'date', 'heure', 'statut', 'medecin_nom'])
+
+
+def compute_dossier_resume(patient_id, version=0):
+    """Calcule le résumé du dossier en deux requêtes agrégées sur l'index patient."""
+    nb_rendez_vous, nb_visites, derniere_visite = db.session.query(
+        db.func.count(RendezVous.id),
+        db.func.sum(db.case((RendezVous.statut == StatutRendezVous.TERMINE, 1), else_=0)),
+        db.func.max(db.case((RendezVous.statut == StatutRendezVous.TERMINE, RendezVous.date)))
+    ).filter(RendezVous.patient_id == patient_id).one()
+
+    nb_absences = db.session.query(db.func.count(FileAttente.id)).filter(
+        FileAttente.patient_id == patient_id,
+        FileAttente.statut_file == StatutFile.ABSENT
+    ).scalar()
+
+    medecins = db.session.query(User.prenom, User.nom).filter(
+        User.id.in_(db.session.query(RendezVous.medecin_id).filter(
+            RendezVous.patient_id == patient_id,
+            RendezVous.statut == StatutRendezVous.TERMINE
+        ))
+    ).order_by(User.nom).all()
+
+    return DossierResume(
+        patient_id=patient_id,
+        version=version,
+        nb_rendez_vous=nb_rendez_vous,
+        nb_visites=nb_visites or 0,
+        nb_absences=nb_absences,
+        derniere_visite=derniere_visite,
+        medecins_vus=', '.join(f"Dr. {prenom} {nom}" for prenom, nom in medecins)[:500] or None,
+        calcule_at=datetime.utcnow()
+    )
+
+
+def get_dossier_resume(patient_id):
+    """
+    Retourne le résumé stocké s'il est à jour, sinon le recalcule et l'enregistre.
+
+    La version du dossier est lue avant le calcul : si une écriture concurrente
+    change le dossier pendant ce temps, le résumé enregistré porte l'ancienne
+    version et le lecteur suivant le recalcule.
+    """
+    version = db.session.query(User.dossier_version).filter(User.id == patient_id).scalar() or 0
+    resume = DossierResume.query.get(patient_id)
+    if resume is not None and resume.version == version:
+        return resume
+
+    calcule = compute_dossier_resume(patient_id, version)
+    try:
+        if resume is None:
+            db.session.add(calcule)
+            resume = calcule
+        else:
+            for champ in ('version', 'nb_rendez_vous', 'nb_visites', 'nb_absences',
+                          'derniere_visite', 'medecins_vus', 'calcule_at'):
+                setattr(resume, champ, getattr(calcule, champ))
+        db.session.commit()
+    except IntegrityError:
+        # Calculé en parallèle par une autre requête : la version stockée est équivalente
+        db.session.rollback()
+        resume = DossierResume.query.get(patient_id)
+    return resume
+
+
+def encode_cursor(row):
+    return f"{row.date.isoformat()}_{row.heure.strftime('%H:%M:%S')}_{row.id}"
+
+
+def decode_cursor(cursor):
+    jour, heure, rv_id = cursor.split('_')
+    return (datetime.strptime(jour, '%Y-%m-%d').date(),
+            datetime.strptime(heure, '%H:%M:%S').time(),
+            int(rv_id))
+
+
+def history_page(patient_id, cursor=None, limit=None):
+    """
+    Page de l'historique des rendez-vous, du plus récent au plus ancien.
+
+    La pagination se fait par clé (date, heure, id) : chaque page est une lecture
+    bornée de l'index ix_rendez_vous_patient_date_heure, quelle que soit la profondeur.
+    Retourne (lignes, curseur de la page suivante ou None).
+    """
+    limit = limit or current_app.config['DOSSIER_PAGE_SIZE']
+    query = db.session.query(
+        RendezVous.id, RendezVous.date, RendezVous.heure, RendezVous.statut,
+        User.prenom, User.nom
+    ).join(User, RendezVous.medecin_id == User.id
+    ).filter(RendezVous.patient_id == patient_id)
+
+    if cursor:
+        query = query.filter(
+            tuple_(RendezVous.date, RendezVous.heure, RendezVous.id) < decode_cursor(cursor)
+        )
+
+    rows = query.order_by(
+        RendezVous.date.desc(), RendezVous.heure.desc(), RendezVous.id.desc()
+    ).limit(limit + 1).all()
+
+    historique = [
+        HistoriqueRow(r.id, r.date, r.heure, r.statut, f"{r.nom} {r.prenom}")
+        for r in rows[:limit]
+    ]
+    next_cursor = encode_cursor(historique[-1]) if len(rows) > limit else None
+    return historique, next_cursor
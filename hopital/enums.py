@@ -0,0 +1,88 @@
+"""
+Rôles et statuts codés en petits entiers.
+
+La base stocke un SMALLINT ; le code Python manipule des IntEnum dont chaque
+membre porte son libellé affiché et son ancienne valeur texte (`literal`), encore
+acceptée en entrée (formulaires, JSON, anciens scripts). Toute autre valeur lève
+ValueError au lieu de ne rien filtrer.
+"""
+
+from enum import IntEnum
+
+from sqlalchemy import SmallInteger
+from sqlalchemy.types import TypeDecorator
+
+
+class LabeledIntEnum(IntEnum):
+    def __new__(cls, value, label, literal=None):
+        member = int.__new__(cls, value)
+        member._value_ = value
+        member.label = label
+        member.literal = literal or label
+        return member
+
+    # Affichage (templates, f-strings) : le libellé
+    def __str__(self):
+        return self.label
+
+    def __format__(self, spec):
+        return format(self.label, spec)
+
+    @classmethod
+    def coerce(cls, value):
+        """Membre, code entier ou ancienne valeur texte -> membre ; ValueError sinon."""
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, str):
+            for member in cls:
+                if member.literal == value:
+                    return member
+            raise ValueError(f"{cls.__name__} : valeur inconnue {value!r}")
+        return cls(value)
+
+
+class Role(LabeledIntEnum):
+    PATIENT = 1, 'Patient', 'patient'
+    MEDECIN = 2, 'Médecin', 'medecin'
+    SECRETAIRE = 3, 'Secrétaire', 'secretaire'
+    ADMIN = 4, 'Admin', 'admin'
+
+
+STAFF_ROLES = (Role.SECRETAIRE, Role.ADMIN)
+PERSONNEL_ROLES = (Role.MEDECIN, Role.SECRETAIRE, Role.ADMIN)
+
+
+class StatutRendezVous(LabeledIntEnum):
+    CONFIRME = 1, 'Confirmé'
+    ANNULE = 2, 'Annulé'
+    TERMINE = 3, 'Terminé'
+
+
+class StatutFile(LabeledIntEnum):
+    EN_ATTENTE = 1, 'En Attente'
+    EN_CONSULTATION = 2, 'En Consultation'
+    TERMINE = 3, 'Terminé'
+    ABSENT = 4, 'Absent'
+    ANNULE = 5, 'Annulé'
+
+
+class StatutRappel(LabeledIntEnum):
+    EN_COURS = 1, 'En cours'
+    ENVOYE = 2, 'Envoyé'
+    ECHEC = 3, 'Échec'
+
+
+class IntEnumType(TypeDecorator):
+    """Colonne SMALLINT lue et écrite comme un LabeledIntEnum."""
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum_class):
+        super().__init__()
+        self.enum_class = enum_class
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else int(self.enum_class.coerce(value))
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else self.enum_class(value)
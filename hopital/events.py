@@ -0,0 +1,177 @@
+"""
+Flux des changements métier (change data feed).
+
+Les écritures ORM sont observées via les événements de session SQLAlchemy :
+- after_flush : les changements sont traduits en événements typés, ajoutés au
+  journal Evenement dans la même transaction que les données ;
+- after_commit : les événements sont diffusés aux abonnés en mémoire.
+Un rollback abandonne à la fois les lignes du journal et la diffusion.
+
+Les UPDATE ensemblistes (Query.update) ne passent pas par le flush : le code
+qui les exécute publie ses événements avec emit().
+"""
+
+import json
+import logging
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import event, insert, inspect, select
+
+from .enums import StatutRendezVous
+from .extensions import db
+from .models import User, Creneau, RendezVous, FileAttente, Evenement
+
+logger = logging.getLogger(__name__)
+
+SLOT_CREATED = 'creneau.cree'
+SLOT_BOOKED = 'creneau.reserve'
+SLOT_RELEASED = 'creneau.libere'
+SLOT_DELETED = 'creneau.supprime'
+SLOTS_PURGED = 'creneaux.purges'  # un événement par lot de la purge des créneaux expirés
+APPOINTMENT_CANCELLED = 'rendez_vous.annule'
+QUEUE_STATUS_CHANGED = 'file_attente.statut'
+USER_UPDATED = 'utilisateur.modifie'
+
+EVENT_TYPES = (SLOT_CREATED, SLOT_BOOKED, SLOT_RELEASED, SLOT_DELETED, SLOTS_PURGED, APPOINTMENT_CANCELLED, QUEUE_STATUS_CHANGED, USER_UPDATED)
+
+DomainEvent = namedtuple('DomainEvent', ['type', 'entite_id', 'payload', 'created_at'])
+
+_PENDING_KEY = 'evenements_en_attente'
+_subscribers = {}
+
+
+def subscribe(event_type, callback):
+    """Abonne `callback(event)` à un type d'événement (None : tous les types)."""
+    _subscribers.setdefault(event_type, []).append(callback)
+
+
+def unsubscribe(event_type, callback):
+    _subscribers.get(event_type, []).remove(callback)
+
+
+def emit(session, event_type, entite_id, **payload):
+    """Publie un événement dans la transaction courante de `session`."""
+    _record(session, [DomainEvent(event_type, entite_id, payload, datetime.utcnow())])
+
+
+def emit_many(session, event_type, items):
+    """Publie un événement par couple (entite_id, payload) ; utilisé par les UPDATE ensemblistes."""
+    now = datetime.utcnow()
+    _record(session, [DomainEvent(event_type, entite_id, payload, now) for entite_id, payload in items])
+
+
+def _record(session, events):
+    if not events:
+        return
+    session.connection().execute(insert(Evenement), [
+        {
+            'type': evt.type,
+            'entite_id': evt.entite_id,
+            'payload': json.dumps(evt.payload, default=str, ensure_ascii=False),
+            'created_at': evt.created_at,
+        }
+        for evt in events
+    ])
+    session.info.setdefault(_PENDING_KEY, []).extend(events)
+
+
+def _changed(obj, attr):
+    """(ancienne valeur, nouvelle valeur) si l'attribut a changé dans ce flush, sinon None."""
+    history = inspect(obj).attrs[attr].history
+    if not history.has_changes():
+        return None
+    old = history.deleted[0] if history.deleted else None
+    new = history.added[0] if history.added else None
+    return old, new
+
+
+def _literal(value):
+    # Les charges utiles restent en JSON simple : statuts et rôles sous leur valeur texte
+    return value.literal if value is not None else None
+
+
+def _events_for(obj, is_new):
+    now = datetime.utcnow()
+    if isinstance(obj, Creneau):
+        if is_new:
+            yield DomainEvent(SLOT_CREATED, obj.id, {'medecin_id': obj.medecin_id, 'date': obj.date,
+                                                     'heure_debut': obj.heure_debut, 'heure_fin': obj.heure_fin}, now)
+        else:
+            change = _changed(obj, 'disponible')
+            if change and change[0] != change[1]:
+                event_type = SLOT_RELEASED if change[1] else SLOT_BOOKED
+                yield DomainEvent(event_type, obj.id, {'medecin_id': obj.medecin_id, 'date': obj.date}, now)
+    elif isinstance(obj, RendezVous):
+        change = None if is_new else _changed(obj, 'statut')
+        if change and change[1] == StatutRendezVous.ANNULE:
+            yield DomainEvent(APPOINTMENT_CANCELLED, obj.id, {'patient_id': obj.patient_id, 'medecin_id': obj.medecin_id,
+                                                             'creneau_id': obj.creneau_id, 'date': obj.date}, now)
+    elif isinstance(obj, FileAttente):
+        change = (None, obj.statut_file) if is_new else _changed(obj, 'statut_file')
+        if change:
+            yield DomainEvent(QUEUE_STATUS_CHANGED, obj.id, {'medecin_id': obj.medecin_id, 'patient_id': obj.patient_id,
+                                                            'date': obj.date, 'ancien': _literal(change[0]),
+                                                            'nouveau': _literal(change[1])}, now)
+    elif isinstance(obj, User) and not is_new:
+        champs = sorted(attr.key for attr in inspect(obj).attrs if attr.history.has_changes())
+        if champs:
+            # Le hash du mot de passe n'est jamais diffusé, seulement le fait qu'il a changé
+            champs = ['password' if champ == 'password_hash' else champ for champ in champs]
+            yield DomainEvent(USER_UPDATED, obj.id, {'role': _literal(obj.role), 'champs': champs}, now)
+
+
+def _after_flush(session, flush_context):
+    events = []
+    for obj in session.new:
+        events.extend(_events_for(obj, is_new=True))
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            events.extend(_events_for(obj, is_new=False))
+    now = datetime.utcnow()
+    for obj in session.deleted:
+        if isinstance(obj, Creneau):
+            events.append(DomainEvent(SLOT_DELETED, obj.id, {'medecin_id': obj.medecin_id, 'date': obj.date,
+                                                             'disponible': obj.disponible}, now))
+    _record(session, events)
+
+
+def _after_commit(session):
+    events = session.info.pop(_PENDING_KEY, None)
+    if not events:
+        return
+    for evt in events:
+        for callback in _subscribers.get(evt.type, []) + _subscribers.get(None, []):
+            try:
+                callback(evt)
+            except Exception:
+                # Les données sont déjà validées : un abonné défaillant ne doit pas faire échouer la requête
+                logger.exception("Abonné en échec pour l'événement %s", evt.type)
+
+
+def _after_soft_rollback(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def replay(after_id=0, event_types=None, batch_size=500):
+    """Relit le journal dans l'ordre à partir de `after_id` ; produit des couples (id, DomainEvent)."""
+    while True:
+        stmt = select(
+            Evenement.id, Evenement.type, Evenement.entite_id, Evenement.payload, Evenement.created_at
+        ).where(Evenement.id > after_id)
+        if event_types:
+            stmt = stmt.where(Evenement.type.in_(event_types))
+        rows = db.session.execute(stmt.order_by(Evenement.id).limit(batch_size)).all()
+        for row in rows:
+            yield row.id, DomainEvent(row.type, row.entite_id, json.loads(row.payload or '{}'), row.created_at)
+        if len(rows) < batch_size:
+            return
+        after_id = rows[-1].id
+
+
+def init_app(app):
+    """Branche les écouteurs sur la session de l'application (une seule fois par processus)."""
+    if not event.contains(db.session, 'after_flush', _after_flush):
+        event.listen(db.session, 'after_flush', _after_flush)
+        event.listen(db.session, 'after_commit', _after_commit)
+        event.listen(db.session, 'after_soft_rollback', _after_soft_rollback)
@@ -0,0 +1,44 @@
+"""
+Extensions Flask partagées, initialisées par create_app().
+"""
+
+from flask import current_app, g, has_app_context
+from flask_login import LoginManager
+from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+
+
+def site_bind_key(site, default_site):
+    """Clé de bind SQLAlchemy d'un site ; le site par défaut utilise la base principale (clé None)."""
+    return None if site == default_site else f'site_{site}'
+
+
+class SiteRoutingSession(Session):
+    """
+    Session qui envoie les tables d'un site vers la base de ce site.
+
+    Les modèles déclarés avec un __bind_key__ (annuaire) gardent leur base ; toutes
+    les autres requêtes vont vers la base du site courant (g.site), la base principale
+    en dehors d'un contexte d'application ou pour le site par défaut.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or not has_app_context():
+            return engine
+
+        engines = self._db.engines
+        if engine is not engines[None]:
+            return engine
+
+        site = g.get('site')
+        if site is None:
+            return engine
+        key = site_bind_key(site, current_app.config['DEFAULT_SITE'])
+        return engines[key]
+
+
+db = SQLAlchemy(session_options={'class_': SiteRoutingSession})
+
+login_manager = LoginManager()
+login_manager.login_view = 'main.login'
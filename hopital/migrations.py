@@ -0,0 +1,180 @@
+"""
+Migrations des bases existantes (db.create_all ne crée que les tables absentes).
+
+Colonnes ajoutées après coup (ADDED_COLUMNS) : ajout de la colonne, remplissage des
+lignes existantes par lots de clés primaires puis création de ses index.
+
+Rôles et statuts texte vers les codes entiers (voir enums.py) : pour chaque colonne encore en texte : ajout d'une colonne <colonne>_code, remplissage
+par lots de clés primaires (un commit par lot), contrôle qu'aucune valeur inconnue
+ne subsiste, puis remplacement de l'ancienne colonne et recréation des index qui la
+couvrent. Chaque étape détecte l'état de la base : la migration est relançable.
+"""
+
+from sqlalchemy import Integer, inspect, text
+
+from .enums import Role, StatutRendezVous, StatutFile, StatutRappel
+from .extensions import db
+from .models import User, Salle, RendezVous, FileAttente, RappelEnvoye, DossierResume
+
+ENUM_COLUMNS = (
+    (User.__table__, 'role', Role),
+    (RendezVous.__table__, 'statut', StatutRendezVous),
+    (FileAttente.__table__, 'statut_file', StatutFile),
+)
+
+# (table, colonne, valeur des lignes existantes en fonction du site migré ; None : laissée vide)
+ADDED_COLUMNS = (
+    # Multi-site : les lignes d'une base appartiennent au site qu'elle sert
+    (User.__table__, 'site', lambda site: site),
+    (Salle.__table__, 'site', lambda site: site),
+    (RappelEnvoye.__table__, 'statut', lambda site: int(StatutRappel.ENVOYE)),
+    (RappelEnvoye.__table__, 'lot', None),
+    (User.__table__, 'dossier_version', lambda site: 0),
+    # Les résumés existants sont tous considérés périmés et recalculés à la lecture
+    (DossierResume.__table__, 'version', lambda site: -1),
+)
+
+
+def _column_types(connection, table_name):
+    return {column['name']: column['type'] for column in inspect(connection).get_columns(table_name)}
+
+
+def _batched_update(engine, table, update, params, batch_size, echo, key='id'):
+    """Exécute `update` (bornes :debut et :fin sur la clé entière `key`) par plages de clés, un commit par lot."""
+    with engine.connect() as connection:
+        first_id, last_id = connection.execute(text(f"SELECT MIN({key}), MAX({key}) FROM {table}")).one()
+    if first_id is None:
+        return
+
+    converted = 0
+    for debut in range(first_id, last_id + 1, batch_size):
+        with engine.begin() as connection:
+            converted += connection.execute(update, dict(params, debut=debut, fin=debut + batch_size)).rowcount
+        echo(f"  {converted} lignes mises à jour ({key} < {debut + batch_size})")
+
+
+def _backfill(engine, table, column, code_column, enum_class, batch_size, echo):
+    cases = ' '.join(f"WHEN :v{member.value} THEN {member.value}" for member in enum_class)
+    params = {f"v{member.value}": member.literal for member in enum_class}
+    update = text(f"UPDATE {table} SET {code_column} = CASE {column} {cases} END "
+                  f"WHERE id >= :debut AND id < :fin AND {code_column} IS NULL")
+    _batched_update(engine, table, update, params, batch_size, echo)
+
+    with engine.connect() as connection:
+        unknown = connection.execute(text(
+            f"SELECT DISTINCT {column} FROM {table} WHERE {code_column} IS NULL AND {column} IS NOT NULL"
+        )).scalars().all()
+    if unknown:
+        raise RuntimeError(f"{table}.{column} : valeurs inconnues {unknown} ; corriger les lignes puis relancer")
+
+
+def add_missing_columns(engine, site, batch_size=1000, echo=print):
+    """Ajoute et remplit les colonnes de ADDED_COLUMNS absentes ou incomplètes ; retourne les colonnes traitées."""
+    preparer = engine.dialect.identifier_preparer
+    migrated = []
+    for table, column_name, fill in ADDED_COLUMNS:
+        column = table.c[column_name]
+        quoted_table, quoted_column = preparer.quote(table.name), preparer.quote(column_name)
+        with engine.connect() as connection:
+            inspector = inspect(connection)
+            if not inspector.has_table(table.name):
+                continue
+            columns = {c['name']: c for c in inspector.get_columns(table.name)}
+            existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            incomplete = column_name in columns and fill is not None and connection.execute(text(
+                f"SELECT 1 FROM {quoted_table} WHERE {quoted_column} IS NULL LIMIT 1"
+            )).first() is not None
+        missing_indexes = [index for index in table.indexes
+                           if column_name in index.columns and index.name not in existing_indexes]
+        if column_name in columns and not incomplete and not missing_indexes:
+            continue
+        echo(f"{table.name}.{column_name}")
+
+        column_type = column.type.compile(dialect=engine.dialect)
+        if column_name not in columns:
+            with engine.begin() as connection:
+                connection.execute(text(f"ALTER TABLE {quoted_table} ADD COLUMN {quoted_column} {column_type}"))
+        if fill is not None:
+            # Clé primaire de la table (patient_id pour dossier_resume)
+            key = preparer.quote(table.primary_key.columns.values()[0].name)
+            update = text(f"UPDATE {quoted_table} SET {quoted_column} = :valeur "
+                          f"WHERE {key} >= :debut AND {key} < :fin AND {quoted_column} IS NULL")
+            _batched_update(engine, quoted_table, update, {'valeur': fill(site)}, batch_size, echo, key)
+            # SQLite ne sait pas rendre une colonne NOT NULL après coup
+            if not column.nullable and engine.dialect.name == 'mysql':
+                with engine.begin() as connection:
+                    connection.execute(text(f"ALTER TABLE {quoted_table} MODIFY {quoted_column} {column_type} NOT NULL"))
+        with engine.begin() as connection:
+            for index in missing_indexes:
+                index.create(connection)
+        migrated.append(f"{table.name}.{column_name}")
+    return migrated
+
+
+def create_missing_indexes(engine, echo=print):
+    """Crée les index déclarés par les modèles et absents des tables existantes ; retourne leurs noms."""
+    created = []
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in db.metadata.sorted_tables:
+            # Les tables de l'annuaire vivent dans leur propre base
+            if table.info.get('bind_key') or not inspector.has_table(table.name):
+                continue
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                if index.name not in existing:
+                    echo(f"  index {index.name}")
+                    index.create(connection)
+                    created.append(index.name)
+    return created
+
+
+def _swap(engine, table, column, code_column, has_text_column):
+    """Remplace la colonne texte par la colonne de codes et recrée les index qui la couvrent."""
+    indexes = [index for index in table.indexes if column.name in index.columns]
+    quote = engine.dialect.identifier_preparer.quote
+    table_name, column_name = quote(table.name), quote(column.name)
+    with engine.begin() as connection:
+        existing = {index['name'] for index in inspect(connection).get_indexes(table.name)}
+        for index in indexes:
+            if index.name in existing:
+                index.drop(connection)
+        if has_text_column:
+            connection.execute(text(f"ALTER TABLE {table_name} DROP COLUMN {column_name}"))
+        if engine.dialect.name == 'mysql':
+            connection.execute(text(f"ALTER TABLE {table_name} CHANGE {code_column} {column_name} SMALLINT"
+                                    f"{'' if column.nullable else ' NOT NULL'}"))
+        else:
+            connection.execute(text(f"ALTER TABLE {table_name} RENAME COLUMN {code_column} TO {column_name}"))
+        for index in indexes:
+            index.create(connection)
+
+
+def migrate_enum_columns(engine, batch_size=1000, echo=print):
+    """Convertit les colonnes de ENUM_COLUMNS encore en texte ; retourne les colonnes migrées."""
+    preparer = engine.dialect.identifier_preparer
+    migrated = []
+    for table, column_name, enum_class in ENUM_COLUMNS:
+        column = table.c[column_name]
+        code_column = f"{column_name}_code"
+        with engine.connect() as connection:
+            if not inspect(connection).has_table(table.name):
+                continue
+            types = _column_types(connection, table.name)
+
+        has_text_column = column_name in types
+        if has_text_column and isinstance(types[column_name], Integer):
+            continue
+        if not has_text_column and code_column not in types:
+            raise RuntimeError(f"{table.name}.{column_name} : colonne absente")
+        echo(f"{table.name}.{column_name} -> SMALLINT")
+
+        quoted_table, quoted_column = preparer.quote(table.name), preparer.quote(column_name)
+        if code_column not in types:
+            with engine.begin() as connection:
+                connection.execute(text(f"ALTER TABLE {quoted_table} ADD COLUMN {code_column} SMALLINT"))
+        if has_text_column:
+            _backfill(engine, quoted_table, quoted_column, code_column, enum_class, batch_size, echo)
+        _swap(engine, table, column, code_column, has_text_column)
+        migrated.append(f"{table.name}.{column_name}")
+    return migrated
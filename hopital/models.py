@@ -0,0 +1,185 @@
+"""
+Modèles de base de données.
+"""
+
+from datetime import datetime, date
+
+from flask_login import UserMixin
+from sqlalchemy.orm import validates
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from .enums import Role, StatutRendezVous, StatutFile, StatutRappel, IntEnumType
+from .extensions import db
+
+
+def _current_site():
+    # Site du contexte courant (DEFAULT_SITE hors requête) ; import différé : sites importe les modèles
+    from .sites import current_site
+    return current_site()
+
+class User(UserMixin, db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    nom = db.Column(db.String(100), nullable=False)
+    prenom = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)
+    role = db.Column(IntEnumType(Role), nullable=False)
+    contact = db.Column(db.String(20))
+    date_naissance = db.Column(db.Date)
+    specialite = db.Column(db.String(100))  # Pour les médecins
+    salle_id = db.Column(db.Integer, db.ForeignKey('salle.id'))  # Pour les médecins
+    site = db.Column(db.String(50), nullable=False, default=_current_site, index=True)
+    # Incrémentée par chaque écriture qui change le dossier (voir invalidate_dossier_resume)
+    dossier_version = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_user_role_specialite', 'role', 'specialite'),)
+
+    def get_id(self):
+        # L'identifiant de session porte le site : la base de l'utilisateur est connue avant de le charger
+        return f"{self.site}:{self.id}"
+
+    @validates('role')
+    def _validate_role(self, key, value):
+        return Role.coerce(value)
+
+    def set_password(self, password):
+        self.password_hash = generate_password_hash(password)
+    
+    def check_password(self, password):
+        return check_password_hash(self.password_hash, password)
+    
+    @property
+    def age(self):
+        if self.date_naissance:
+            today = date.today()
+            return today.year - self.date_naissance.year - ((today.month, today.day) < (self.date_naissance.month, self.date_naissance.day))
+        return None
+
+class Salle(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    numero = db.Column(db.String(20), nullable=False, unique=True)
+    nom = db.Column(db.String(100))
+    disponible = db.Column(db.Boolean, default=True)
+    site = db.Column(db.String(50), nullable=False, default=_current_site, index=True)
+    medecins = db.relationship('User', backref='salle_ref')
+
+class Creneau(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    medecin_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    heure_debut = db.Column(db.Time, nullable=False)
+    heure_fin = db.Column(db.Time, nullable=False)
+    disponible = db.Column(db.Boolean, default=True)
+    medecin = db.relationship('User', backref='creneaux')
+
+    # Index de la recherche "premier créneau disponible" (créneaux libres d'un médecin triés)
+    __table_args__ = (db.Index('ix_creneau_medecin_dispo_date', 'medecin_id', 'disponible', 'date', 'heure_debut'),)
+
+class RendezVous(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    patient_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    medecin_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    creneau_id = db.Column(db.Integer, db.ForeignKey('creneau.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    heure = db.Column(db.Time, nullable=False)
+    statut = db.Column(IntEnumType(StatutRendezVous), default=StatutRendezVous.CONFIRME)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Sélection des rappels (rendez-vous confirmés d'une date donnée)
+        db.Index('ix_rendez_vous_date_statut', 'date', 'statut'),
+        # Pagination par clé de l'historique du dossier patient
+        db.Index('ix_rendez_vous_patient_date_heure', 'patient_id', 'date', 'heure', 'id'),
+    )
+
+    @validates('statut')
+    def _validate_statut(self, key, value):
+        return StatutRendezVous.coerce(value)
+    
+    patient = db.relationship('User', foreign_keys=[patient_id], backref='rendez_vous_patient')
+    medecin = db.relationship('User', foreign_keys=[medecin_id], backref='rendez_vous_medecin')
+    creneau = db.relationship('Creneau', backref='rendez_vous')
+
+class FileAttente(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    rendez_vous_id = db.Column(db.Integer, db.ForeignKey('rendez_vous.id'), nullable=False)
+    patient_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    medecin_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    heure_rendezvous = db.Column(db.Time, nullable=False)
+    statut_file = db.Column(IntEnumType(StatutFile), default=StatutFile.EN_ATTENTE)
+    ordre = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @validates('statut_file')
+    def _validate_statut_file(self, key, value):
+        return StatutFile.coerce(value)
+    
+    rendez_vous = db.relationship('RendezVous', backref='file_attente')
+    patient = db.relationship('User', foreign_keys=[patient_id], backref='files_attente_patient')
+    medecin = db.relationship('User', foreign_keys=[medecin_id], backref='files_attente_medecin')
+
+class RappelEnvoye(db.Model):
+    """Réservation puis trace d'envoi d'un rappel : une ligne par rendez-vous, écrite avant l'envoi."""
+    id = db.Column(db.Integer, primary_key=True)
+    rendez_vous_id = db.Column(db.Integer, db.ForeignKey('rendez_vous.id'), nullable=False, unique=True)
+    canal = db.Column(db.String(20), nullable=False)  # 'file', 'smtp'
+    statut = db.Column(IntEnumType(StatutRappel), nullable=False, default=StatutRappel.EN_COURS)
+    lot = db.Column(db.String(32))  # Exécution de la tâche qui a réservé le rappel
+    envoye_at = db.Column(db.DateTime, default=datetime.utcnow)  # Réservation tant que EN_COURS, puis envoi ou échec
+
+    @validates('statut')
+    def _validate_statut(self, key, value):
+        return StatutRappel.coerce(value)
+
+class DossierResume(db.Model):
+    """Résumé précalculé du dossier patient, valable tant que sa version est celle du patient ; recalculé à la lecture sinon."""
+    patient_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)  # User.dossier_version lue avant le calcul
+    nb_rendez_vous = db.Column(db.Integer, nullable=False, default=0)
+    nb_visites = db.Column(db.Integer, nullable=False, default=0)
+    nb_absences = db.Column(db.Integer, nullable=False, default=0)
+    derniere_visite = db.Column(db.Date)
+    medecins_vus = db.Column(db.String(500))
+    calcule_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @property
+    def taux_absence(self):
+        total = self.nb_visites + self.nb_absences
+        return round(100 * self.nb_absences / total) if total else None
+
+class Evenement(db.Model):
+    """Journal append-only des événements métier, écrit dans la même transaction que les données (rejouable par id)."""
+    id = db.Column(db.Integer, primary_key=True)
+    type = db.Column(db.String(50), nullable=False, index=True)
+    entite_id = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.Text)  # JSON
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class RapportMensuel(db.Model):
+    """Rapport d'activité figé d'un mois clos (JSON), calculé une seule fois par hopital.analytics."""
+    mois = db.Column(db.String(7), primary_key=True)  # 'AAAA-MM'
+    contenu = db.Column(db.Text, nullable=False)  # JSON
+    calcule_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class AnnuaireUtilisateur(db.Model):
+    """Annuaire de connexion partagé par tous les sites : email -> site et id de l'utilisateur dans la base du site."""
+    __bind_key__ = 'annuaire'
+    email = db.Column(db.String(120), primary_key=True)
+    site = db.Column(db.String(50), nullable=False)
+    user_id = db.Column(db.Integer, nullable=False)
+
+def invalidate_dossier_resume(patient_ids):
+    """
+    Invalide le résumé des patients donnés (liste d'ids ou sous-requête), dans la transaction courante.
+
+    Seule la version du dossier est incrémentée : le résumé stocké n'est pas
+    supprimé (un lecteur peut être en train de le mettre à jour), il ne correspond
+    plus à la version et sera recalculé à la lecture suivante. Un résumé calculé en
+    parallèle à partir de données antérieures à cette écriture porte l'ancienne
+    version et sera lui aussi recalculé.
+    """
+    User.query.filter(User.id.in_(patient_ids)).update(
+        {User.dossier_version: User.dossier_version + 1}, synchronize_session=False
+    )
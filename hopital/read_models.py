@@ -0,0 +1,147 @@
+"""
+Couche de lecture des vues de liste.
+
+Chaque fonction sélectionne uniquement les colonnes affichées par sa vue et
+renvoie des tuples nommés (sans __dict__) : les lignes ne passent pas par
+l'identity map de la session et ne chargent ni password_hash ni relations.
+"""
+
+from collections import namedtuple
+from datetime import date
+
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+
+from .enums import Role, StatutRendezVous, PERSONNEL_ROLES
+from .extensions import db
+from .models import User, Salle, Creneau, RendezVous, FileAttente
+
+PersonnelRow = namedtuple('PersonnelRow', ['id', 'nom', 'prenom', 'email', 'role', 'specialite', 'salle_numero'])
+DoctorRow = namedtuple('DoctorRow', ['id', 'nom', 'prenom', 'specialite', 'salle_numero'])
+SalleOption = namedtuple('SalleOption', ['id', 'numero', 'nom'])
+SalleRow = namedtuple('SalleRow', ['id', 'numero', 'nom', 'disponible', 'medecins'])
+SlotRow = namedtuple('SlotRow', ['id', 'date', 'heure_debut', 'heure_fin', 'disponible'])
+QueueEntryRow = namedtuple('QueueEntryRow', ['id', 'medecin_id', 'patient_id', 'patient_nom', 'heure_rendezvous', 'statut_file'])
+UpcomingAppointmentRow = namedtuple('UpcomingAppointmentRow', ['id', 'date', 'heure', 'statut', 'medecin_nom', 'specialite'])
+PastAppointmentRow = namedtuple('PastAppointmentRow', ['date', 'patient_nom'])
+AppointmentRow = namedtuple('AppointmentRow', ['id', 'date', 'heure', 'statut', 'created_at', 'patient_nom', 'medecin_nom'])
+
+
+class PatientRow(namedtuple('PatientRow', ['id', 'nom', 'prenom', 'email', 'contact', 'date_naissance', 'created_at'])):
+    __slots__ = ()
+
+    @property
+    def age(self):
+        if self.date_naissance:
+            today = date.today()
+            return today.year - self.date_naissance.year - ((today.month, today.day) < (self.date_naissance.month, self.date_naissance.day))
+        return None
+
+
+def _rows(row_type, stmt):
+    return [row_type._make(row) for row in db.session.execute(stmt)]
+
+
+def list_personnel():
+    stmt = select(
+        User.id, User.nom, User.prenom, User.email, User.role, User.specialite, Salle.numero
+    ).outerjoin(Salle, User.salle_id == Salle.id
+    ).where(User.role.in_(PERSONNEL_ROLES)
+    ).order_by(User.nom, User.prenom)
+    return _rows(PersonnelRow, stmt)
+
+
+def list_patients():
+    stmt = select(
+        User.id, User.nom, User.prenom, User.email, User.contact, User.date_naissance, User.created_at
+    ).where(User.role == Role.PATIENT).order_by(User.nom, User.prenom)
+    return _rows(PatientRow, stmt)
+
+
+def list_doctors(*filters):
+    stmt = select(
+        User.id, User.nom, User.prenom, User.specialite, Salle.numero
+    ).outerjoin(Salle, User.salle_id == Salle.id
+    ).where(User.role == Role.MEDECIN, *filters).order_by(User.nom, User.prenom)
+    return _rows(DoctorRow, stmt)
+
+
+def list_salle_options():
+    return _rows(SalleOption, select(Salle.id, Salle.numero, Salle.nom).order_by(Salle.numero))
+
+
+def list_salles():
+    medecins = {}
+    for salle_id, nom, prenom in db.session.execute(
+        select(User.salle_id, User.nom, User.prenom).where(User.salle_id.isnot(None)).order_by(User.nom)
+    ):
+        medecins.setdefault(salle_id, []).append(f"{nom} {prenom}")
+
+    return [
+        SalleRow(salle_id, numero, nom, disponible, medecins.get(salle_id, []))
+        for salle_id, numero, nom, disponible in db.session.execute(
+            select(Salle.id, Salle.numero, Salle.nom, Salle.disponible).order_by(Salle.numero)
+        )
+    ]
+
+
+def list_doctor_slots(medecin_id, *filters):
+    stmt = select(
+        Creneau.id, Creneau.date, Creneau.heure_debut, Creneau.heure_fin, Creneau.disponible
+    ).where(Creneau.medecin_id == medecin_id, *filters).order_by(Creneau.date, Creneau.heure_debut)
+    return _rows(SlotRow, stmt)
+
+
+def list_queue_entries(jour, medecin_id=None):
+    """File d'attente du jour (tous médecins, ou un seul), triée par heure de rendez-vous."""
+    stmt = select(
+        FileAttente.id, FileAttente.medecin_id, FileAttente.patient_id,
+        User.prenom, User.nom, FileAttente.heure_rendezvous, FileAttente.statut_file
+    ).join(User, FileAttente.patient_id == User.id).where(FileAttente.date == jour)
+    if medecin_id is not None:
+        stmt = stmt.where(FileAttente.medecin_id == medecin_id)
+    stmt = stmt.order_by(FileAttente.heure_rendezvous)
+    return [
+        QueueEntryRow(fa_id, med_id, patient_id, f"{prenom} {nom}", heure, statut)
+        for fa_id, med_id, patient_id, prenom, nom, heure, statut in db.session.execute(stmt)
+    ]
+
+
+def list_upcoming_appointments(patient_id):
+    stmt = select(
+        RendezVous.id, RendezVous.date, RendezVous.heure, RendezVous.statut,
+        User.nom, User.prenom, User.specialite
+    ).join(User, RendezVous.medecin_id == User.id).where(
+        RendezVous.patient_id == patient_id,
+        RendezVous.date >= date.today(),
+        RendezVous.statut == StatutRendezVous.CONFIRME
+    ).order_by(RendezVous.date, RendezVous.heure)
+    return [
+        UpcomingAppointmentRow(rv_id, jour, heure, statut, f"{nom} {prenom}", specialite or 'Non spécifiée')
+        for rv_id, jour, heure, statut, nom, prenom, specialite in db.session.execute(stmt)
+    ]
+
+
+def list_past_appointments(medecin_id, limit=10):
+    stmt = select(RendezVous.date, User.prenom, User.nom).join(
+        User, RendezVous.patient_id == User.id
+    ).where(
+        RendezVous.medecin_id == medecin_id,
+        RendezVous.date < date.today()
+    ).order_by(RendezVous.date.desc()).limit(limit)
+    return [PastAppointmentRow(jour, f"{prenom} {nom}") for jour, prenom, nom in db.session.execute(stmt)]
+
+
+def list_appointments():
+    Patient = aliased(User)
+    Medecin = aliased(User)
+    stmt = select(
+        RendezVous.id, RendezVous.date, RendezVous.heure, RendezVous.statut, RendezVous.created_at,
+        Patient.prenom, Patient.nom, Medecin.prenom, Medecin.nom
+    ).join(Patient, RendezVous.patient_id == Patient.id
+    ).join(Medecin, RendezVous.medecin_id == Medecin.id
+    ).order_by(RendezVous.date.desc(), RendezVous.heure.desc())
+    return [
+        AppointmentRow(r[0], r[1], r[2], r[3], r[4], f"{r[5]} {r[6]}", f"{r[7]} {r[8]}")
+        for r in db.session.execute(stmt)
+    ]
@@ -0,0 +1,303 @@
+"""
+Envoi des rappels de rendez-vous (veille de la consultation).
+
+La tâche est lancée par le planificateur (cron, systemd timer...) via
+`flask send-reminders` et ne doit jamais s'exécuter dans une requête web.
+"""
+
+import json
+import os
+import smtplib
+import threading
+import time as time_module
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from email.message import EmailMessage
+
+from flask import current_app, has_request_context
+from sqlalchemy import and_, insert, or_, select, update
+from sqlalchemy.orm import aliased
+
+from .enums import StatutRendezVous, StatutRappel
+from .extensions import db
+from .models import User, RendezVous, RappelEnvoye
+
+Rappel = namedtuple('Rappel', [
+    'rendez_vous_id', 'date', 'heure',
+    'patient_nom', 'email', 'contact', 'medecin_nom'
+])
+
+
+class ReminderSender:
+    """Canal d'envoi d'un rappel. Les implémentations doivent être thread-safe."""
+    name = None
+
+    def send(self, rappel):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class FileSender(ReminderSender):
+    """Écrit chaque rappel dans un fichier JSON Lines (tests, environnement local)."""
+    name = 'file'
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def send(self, rappel):
+        line = json.dumps({
+            'rendez_vous_id': rappel.rendez_vous_id,
+            'email': rappel.email,
+            'contact': rappel.contact,
+            'message': format_message(rappel),
+        }, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class SmtpSender(ReminderSender):
+    """Envoie le rappel par email. Une connexion SMTP est conservée par worker."""
+    name = 'smtp'
+
+    def __init__(self, host, port, sender):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = smtplib.SMTP(self.host, self.port, timeout=10)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def send(self, rappel):
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = rappel.email
+        message['Subject'] = 'Rappel de votre rendez-vous'
+        message.set_content(format_message(rappel))
+        try:
+            self._connection().send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            # Connexion fermée par le serveur : on la recrée au prochain essai
+            self._local.conn = None
+            raise
+
+    def close(self):
+        for conn in self._connections:
+            try:
+                conn.quit()
+            except smtplib.SMTPException:
+                pass
+
+
+SENDERS = {
+    FileSender.name: lambda config: FileSender(config['REMINDER_OUTBOX_PATH']),
+    SmtpSender.name: lambda config: SmtpSender(config['SMTP_HOST'], config['SMTP_PORT'], config['SMTP_SENDER']),
+}
+
+
+def get_sender(backend=None):
+    backend = backend or current_app.config['REMINDER_BACKEND']
+    if backend not in SENDERS:
+        raise ValueError(f"Canal de rappel inconnu : {backend}")
+    return SENDERS[backend](current_app.config)
+
+
+def format_message(rappel):
+    return (f"Bonjour {rappel.patient_nom}, nous vous rappelons votre rendez-vous avec "
+            f"Dr. {rappel.medecin_nom} le {rappel.date.strftime('%d/%m/%Y')} "
+            f"à {rappel.heure.strftime('%H:%M')}.")
+
+
+def _reclaimable(table, stale_before):
+    """Réservation reprenable : en échec, ou restée en cours depuis avant `stale_before` (exécution interrompue)."""
+    return or_(table.c.statut == StatutRappel.ECHEC,
+               and_(table.c.statut == StatutRappel.EN_COURS, table.c.envoye_at < stale_before))
+
+
+def iter_reminders(jour, batch_size, stale_before):
+    """
+    Rendez-vous confirmés du jour sans rappel réservé (ou à reprendre), lus par pages
+    de clés (id > dernier lu) : aucun curseur ne reste ouvert pendant les commits
+    des réservations.
+    """
+    Patient = aliased(User)
+    Medecin = aliased(User)
+    stmt = select(
+        RendezVous.id, RendezVous.date, RendezVous.heure,
+        Patient.prenom, Patient.nom, Patient.email, Patient.contact,
+        Medecin.prenom, Medecin.nom
+    ).join(Patient, RendezVous.patient_id == Patient.id
+    ).join(Medecin, RendezVous.medecin_id == Medecin.id
+    ).outerjoin(RappelEnvoye, RappelEnvoye.rendez_vous_id == RendezVous.id
+    ).where(
+        RendezVous.date == jour,
+        RendezVous.statut == StatutRendezVous.CONFIRME,
+        or_(RappelEnvoye.id.is_(None), _reclaimable(RappelEnvoye.__table__, stale_before))
+    ).order_by(RendezVous.id).limit(batch_size)
+
+    last_id = 0
+    while True:
+        rows = db.session.execute(stmt.where(RendezVous.id > last_id)).all()
+        db.session.commit()
+        for row in rows:
+            yield Rappel(row[0], row[1], row[2], f"{row[3]} {row[4]}", row[5], row[6], f"{row[7]} {row[8]}")
+        if len(rows) < batch_size:
+            return
+        last_id = rows[-1][0]
+
+
+def _send_with_retry(sender, rappel, max_retries):
+    for attempt in range(max_retries + 1):
+        try:
+            sender.send(rappel)
+            return rappel, None
+        except Exception as exc:  # Le canal peut lever n'importe quelle erreur réseau
+            if attempt == max_retries:
+                return rappel, exc
+            time_module.sleep(min(0.5 * 2 ** attempt, 10))
+
+
+def _reserve(rappels, canal, lot, stale_before):
+    """
+    Réserve les rappels avant envoi : une ligne EN_COURS par rendez-vous, insérée
+    en ignorant les conflits (unicité de rendez_vous_id) ; les échecs et les
+    réservations périmées d'une exécution précédente sont repris par un UPDATE
+    conditionnel. Retourne les rappels dont la réservation appartient à cette
+    exécution (`lot`).
+    """
+    if not rappels:
+        return []
+    ids = [rappel.rendez_vous_id for rappel in rappels]
+    table = RappelEnvoye.__table__
+    now = datetime.utcnow()
+    try:
+        db.session.execute(
+            insert(table).prefix_with('IGNORE', dialect='mysql').prefix_with('OR IGNORE', dialect='sqlite'),
+            [{'rendez_vous_id': rv_id, 'canal': canal, 'statut': StatutRappel.EN_COURS, 'lot': lot, 'envoye_at': now}
+             for rv_id in ids]
+        )
+        db.session.execute(
+            update(table)
+            .where(table.c.rendez_vous_id.in_(ids), _reclaimable(table, stale_before))
+            .values(statut=StatutRappel.EN_COURS, canal=canal, lot=lot, envoye_at=now)
+        )
+        reserved = set(db.session.execute(
+            select(table.c.rendez_vous_id).where(table.c.rendez_vous_id.in_(ids), table.c.lot == lot)
+        ).scalars())
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return [rappel for rappel in rappels if rappel.rendez_vous_id in reserved]
+
+
+def _mark(rendez_vous_ids, statut, lot):
+    if not rendez_vous_ids:
+        return
+    table = RappelEnvoye.__table__
+    try:
+        db.session.execute(
+            update(table)
+            .where(table.c.rendez_vous_id.in_(rendez_vous_ids), table.c.lot == lot)
+            .values(statut=statut, envoye_at=datetime.utcnow())
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def send_reminders(jour, backend=None, workers=None, sender=None):
+    """
+    Envoie les rappels des rendez-vous confirmés de `jour`.
+
+    Chaque rappel est réservé dans RappelEnvoye (statut EN_COURS) avant d'être
+    envoyé : deux exécutions qui se chevauchent ne réservent jamais le même
+    rendez-vous. Le statut passe ensuite à ENVOYE ou ECHEC (mis à jour par lots) ;
+    une relance reprend les échecs, ainsi que les réservations restées EN_COURS
+    depuis plus de REMINDER_RESERVATION_TIMEOUT minutes (exécution interrompue),
+    qui doit donc dépasser la durée d'une exécution. Les envois sont répartis sur un pool de
+    workers borné (les rappels en vol ne dépassent jamais deux fois la taille du
+    pool). Seule la base du site courant (sites.use_site) est parcourue.
+    """
+    if has_request_context():
+        raise RuntimeError("L'envoi des rappels ne doit pas être exécuté dans une requête web.")
+
+    config = current_app.config
+    workers = workers or config['REMINDER_WORKERS']
+    max_retries = config['REMINDER_MAX_RETRIES']
+    batch_size = config['REMINDER_BATCH_SIZE']
+    sender = sender or get_sender(backend)
+    canal = sender.name or backend or config['REMINDER_BACKEND']
+    lot = uuid.uuid4().hex
+    stale_before = datetime.utcnow() - timedelta(minutes=config['REMINDER_RESERVATION_TIMEOUT'])
+
+    stats = {'selectionnes': 0, 'reserves': 0, 'envoyes': 0, 'echecs': 0}
+    started = time_module.monotonic()
+    results = {StatutRappel.ENVOYE: [], StatutRappel.ECHEC: []}
+    in_flight = set()
+
+    def collect(done):
+        for future in done:
+            rappel, error = future.result()
+            if error is None:
+                stats['envoyes'] += 1
+                results[StatutRappel.ENVOYE].append(rappel.rendez_vous_id)
+            else:
+                stats['echecs'] += 1
+                results[StatutRappel.ECHEC].append(rappel.rendez_vous_id)
+                current_app.logger.warning("Rappel %s non envoyé : %s", rappel.rendez_vous_id, error)
+        for statut, ids in results.items():
+            if len(ids) >= batch_size:
+                _mark(ids, statut, lot)
+                ids.clear()
+
+    def submit(rappels):
+        nonlocal in_flight
+        for rappel in _reserve(rappels, canal, lot, stale_before):
+            stats['reserves'] += 1
+            if len(in_flight) >= workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+            in_flight.add(pool.submit(_send_with_retry, sender, rappel, max_retries))
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = []
+            for rappel in iter_reminders(jour, batch_size, stale_before):
+                stats['selectionnes'] += 1
+                pending.append(rappel)
+                # Réservations par petits paquets : un rappel réservé est envoyé aussitôt
+                if len(pending) >= workers:
+                    submit(pending)
+                    pending = []
+            submit(pending)
+            done, _ = wait(in_flight)
+            collect(done)
+    finally:
+        for statut, ids in results.items():
+            _mark(ids, statut, lot)
+        sender.close()
+
+    stats['duree'] = time_module.monotonic() - started
+    return stats
@@ -0,0 +1,845 @@
+"""
+Routes de l'application (blueprint principal).
+"""
+
+from datetime import datetime, date, time
+
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash, jsonify
+from flask_login import login_user, login_required, logout_user, current_user
+
+from . import read_models, sites
+from .bulk_operations import cancel_doctor_appointments, mark_remaining_absent, apply_queue_transitions, QUEUE_TRANSITIONS
+from .dossier import get_dossier_resume, history_page
+from .enums import Role, StatutRendezVous, StatutFile, STAFF_ROLES, PERSONNEL_ROLES
+from .extensions import db
+from .models import User, Creneau, RendezVous, FileAttente, invalidate_dossier_resume
+from .slot_search import first_available_slots
+from .templating import badge_class
+
+bp = Blueprint('main', __name__)
+
+# Routes principales
+@bp.route('/')
+def index():
+    if current_user.is_authenticated:
+        return redirect(url_for('main.dashboard'))
+    return render_template('layouts/base.html')
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        username = request.form['username']
+        password = request.form['password']
+        
+        # L'annuaire indique la base du site de l'utilisateur
+        entry = sites.lookup(username)
+        if entry:
+            sites.set_current_site(entry.site)
+        user = User.query.filter_by(email=username).first()
+        if user and user.check_password(password):
+            login_user(user)
+            return redirect(url_for('main.dashboard'))
+        else:
+            flash('Identifiants incorrects', 'danger')
+    
+    return render_template('auth/login.html')
+
+@bp.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    return redirect(url_for('main.login'))
+
+@bp.route('/register-patient', methods=['GET', 'POST'])
+def register_patient():
+    if request.method == 'POST':
+        nom = request.form['nom']
+        prenom = request.form['prenom']
+        email = request.form['email']
+        password = request.form['password']
+        contact = request.form['contact']
+        date_naissance = datetime.strptime(request.form['date_naissance'], '%Y-%m-%d').date()
+        site = request.form.get('site') or sites.current_site()
+        
+        try:
+            sites.set_current_site(site)
+        except ValueError:
+            flash('Site inconnu', 'danger')
+            return render_template('auth/register_patient.html', sites=sites.site_keys())
+        
+        if sites.email_taken(email):
+            flash('Cet email est déjà utilisé', 'danger')
+            return render_template('auth/register_patient.html', sites=sites.site_keys())
+        
+        user = User(
+            nom=nom, prenom=prenom, email=email, 
+            contact=contact, date_naissance=date_naissance, role=Role.PATIENT, site=site
+        )
+        user.set_password(password)
+        db.session.add(user)
+        db.session.flush()
+        sites.register(user)
+        db.session.commit()
+        
+        flash('Inscription réussie ! Vous pouvez maintenant vous connecter.', 'success')
+        return redirect(url_for('main.login'))
+    
+    return render_template('auth/register_patient.html', sites=sites.site_keys())
+
+@bp.route('/dashboard')
+@login_required
+def dashboard():
+    if current_user.role == Role.PATIENT:
+        upcoming_appointments = read_models.list_upcoming_appointments(current_user.id)
+        return render_template('patient/dashboard.html', upcoming_appointments=upcoming_appointments)
+    
+    elif current_user.role == Role.MEDECIN:
+        today = date.today()
+        
+        return render_template('medecin/dashboard.html', 
+                             today_patients=read_models.list_queue_entries(today, current_user.id),
+                             future_slots=read_models.list_doctor_slots(current_user.id, Creneau.date >= today),
+                             past_appointments=read_models.list_past_appointments(current_user.id),
+                             date_du_jour=today)
+    
+    elif current_user.role in STAFF_ROLES:
+        # Statistiques pour le secrétariat
+        return render_template('admin_secretariat/dashboard.html')
+    
+    return redirect(url_for('main.login'))
+
+# Routes pour la gestion des patients
+@bp.route('/book-appointment')
+@login_required
+def book_appointment():
+    if current_user.role != Role.PATIENT:
+        flash('Accès non autorisé', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    specialities = db.session.query(User.specialite).filter(
+        User.role == Role.MEDECIN,
+        User.specialite.isnot(None)
+    ).distinct().all()
+    specialities = [s[0] for s in specialities]
+    
+    selected_speciality = request.args.get('speciality')
+    selected_doctor_id = request.args.get('doctor_id')
+    selected_doctor = None
+    doctors_by_speciality = []
+    available_slots = []
+    
+    first_slots = []
+    
+    if selected_speciality:
+        doctors_by_speciality = read_models.list_doctors(User.specialite == selected_speciality)
+        if not selected_doctor_id:
+            try:
+                first_slots = _first_available_from_args(selected_speciality)
+            except ValueError:
+                flash('Format de date ou d\'heure invalide', 'danger')
+    
+    if selected_doctor_id:
+        selected_doctor = User.query.get(selected_doctor_id)
+        if selected_doctor and selected_doctor.role == Role.MEDECIN:
+            # Récupérer les créneaux disponibles
+            available_slots = read_models.list_doctor_slots(
+                selected_doctor.id,
+                Creneau.date >= date.today(),
+                Creneau.disponible == True
+            )
+    
+    return render_template('patient/appointment_booking.html',
+                         specialities=specialities,
+                         selected_speciality=selected_speciality,
+                         doctors_by_speciality=doctors_by_speciality,
+                         selected_doctor=selected_doctor,
+                         available_slots=available_slots,
+                         first_slots=first_slots)
+
+def _first_available_from_args(specialite):
+    """Premiers créneaux libres d'une spécialité selon la fenêtre passée en paramètres (date, heure_min, heure_max)."""
+    jour = request.args.get('date')
+    heure_min = request.args.get('heure_min')
+    heure_max = request.args.get('heure_max')
+    return first_available_slots(
+        specialite,
+        limit=min(request.args.get('limit', 10, type=int), 50),
+        jour=datetime.strptime(jour, '%Y-%m-%d').date() if jour else None,
+        heure_min=datetime.strptime(heure_min, '%H:%M').time() if heure_min else None,
+        heure_max=datetime.strptime(heure_max, '%H:%M').time() if heure_max else None
+    )
+
+@bp.route('/api/first-available')
+@login_required
+def api_first_available():
+    """API : premiers créneaux libres d'une spécialité, tous médecins confondus."""
+    if current_user.role not in (Role.PATIENT, *STAFF_ROLES):
+        return jsonify({'error': 'Accès non autorisé'}), 403
+    
+    specialite = request.args.get('speciality')
+    if not specialite:
+        return jsonify({'error': 'Paramètre speciality requis'}), 400
+    
+    try:
+        slots = _first_available_from_args(specialite)
+    except ValueError:
+        return jsonify({'error': 'Format de date ou d\'heure invalide'}), 400
+    
+    return jsonify([
+        {
+            'id': slot.id,
+            'medecin_id': slot.medecin_id,
+            'medecin_nom': slot.medecin_nom,
+            'date': slot.date.strftime('%Y-%m-%d'),
+            'heure_debut': slot.heure_debut.strftime('%H:%M'),
+            'heure_fin': slot.heure_fin.strftime('%H:%M')
+        }
+        for slot in slots
+    ])
+
+@bp.route('/confirm-appointment', methods=['POST'])
+@login_required
+def confirm_appointment():
+    if current_user.role != Role.PATIENT:
+        flash('Accès non autorisé', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    slot_id = request.form['slot_id']
+    slot = Creneau.query.get(slot_id)
+    
+    if not slot or not slot.disponible:
+        flash('Ce créneau n\'est plus disponible', 'danger')
+        return redirect(url_for('main.book_appointment'))
+    
+    # Créer le rendez-vous
+    rv = RendezVous(
+        patient_id=current_user.id,
+        medecin_id=slot.medecin_id,
+        creneau_id=slot.id,
+        date=slot.date,
+        heure=slot.heure_debut,
+        statut=StatutRendezVous.CONFIRME
+    )
+    
+    slot.disponible = False
+    db.session.add(rv)
+    invalidate_dossier_resume([current_user.id])
+    db.session.commit()
+    
+    # Ajouter à la file d'attente
+    file_attente = FileAttente(
+        rendez_vous_id=rv.id,
+        patient_id=current_user.id,
+        medecin_id=slot.medecin_id,
+        date=slot.date,
+        heure_rendezvous=slot.heure_debut,
+        statut_file=StatutFile.EN_ATTENTE
+    )
+    db.session.add(file_attente)
+    db.session.commit()
+    
+    flash('Rendez-vous confirmé avec succès !', 'success')
+    return redirect(url_for('main.dashboard'))
+
+@bp.route('/cancel-appointment/<int:rv_id>', methods=['POST'])
+@login_required
+def cancel_appointment(rv_id):
+    rv = RendezVous.query.get(rv_id)
+    if rv and rv.patient_id == current_user.id:
+        rv.statut = StatutRendezVous.ANNULE
+        rv.creneau.disponible = True
+        
+        # Mettre à jour la file d'attente
+        fa = FileAttente.query.filter_by(rendez_vous_id=rv_id).first()
+        if fa:
+            fa.statut_file = StatutFile.ANNULE
+        
+        invalidate_dossier_resume([rv.patient_id])
+        db.session.commit()
+        flash('Rendez-vous annulé', 'success')
+    
+    return redirect(url_for('main.dashboard'))
+
+@bp.route('/edit-profile', methods=['GET', 'POST'])
+@login_required
+def edit_profile():
+    if current_user.role != Role.PATIENT:
+        flash('Accès non autorisé', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    if request.method == 'POST':
+        current_user.nom = request.form['nom']
+        current_user.prenom = request.form['prenom']
+        current_user.contact = request.form['contact']
+        
+        if request.form['date_naissance']:
+            current_user.date_naissance = datetime.strptime(request.form['date_naissance'], '%Y-%m-%d').date()
+        
+        # Gérer le changement de mot de passe
+        password = request.form.get('password')
+        password_confirm = request.form.get('password_confirm')
+        if password:
+            if password != password_confirm:
+                flash('Les mots de passe ne correspondent pas.', 'danger')
+                return redirect(url_for('main.edit_profile'))
+            current_user.set_password(password)
+
+        db.session.commit()
+        flash('Profil mis à jour', 'success')
+        return redirect(url_for('main.dashboard'))
+    
+    return render_template('patient/edit_profile.html')
+
+# Routes pour les médecins
+@bp.route('/add-slot', methods=['GET', 'POST'])
+@login_required
+def add_slot():
+    if current_user.role != Role.MEDECIN:
+        flash('Accès non autorisé', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    if request.method == 'POST':
+        date_slot = datetime.strptime(request.form['date'], '%Y-%m-%d').date()
+        heure_debut = datetime.strptime(request.form['heure_debut'], '%H:%M').time()
+        heure_fin = datetime.strptime(request.form['heure_fin'], '%H:%M').time()
+        
+        # Vérifier les conflits
+        existing = Creneau.query.filter(
+            Creneau.medecin_id == current_user.id,
+            Creneau.date == date_slot,
+            Creneau.heure_debut < heure_fin,
+            Creneau.heure_fin > heure_debut
+        ).first()
+        
+        if existing:
+            flash('Conflit avec un créneau existant', 'danger')
+        else:
+            slot = Creneau(
+                medecin_id=current_user.id,
+                date=date_slot,
+                heure_debut=heure_debut,
+                heure_fin=heure_fin,
+                disponible=True
+            )
+            db.session.add(slot)
+            db.session.commit()
+            flash('Créneau ajouté avec succès', 'success')
+            return redirect(url_for('main.dashboard'))
+    
+    return render_template('medecin/add_slot.html')
+
+@bp.route('/delete-slot/<int:slot_id>')
+@login_required
+def delete_slot(slot_id):
+    slot = Creneau.query.get(slot_id)
+    if slot and slot.medecin_id == current_user.id and slot.disponible:
+        db.session.delete(slot)
+        db.session.commit()
+        flash('Créneau supprimé', 'success')
+    
+    return redirect(url_for('main.dashboard'))
+
+@bp.route('/start-consultation/<int:queue_id>')
+@login_required
+def start_consultation(queue_id):
+    if current_user.role != Role.MEDECIN:
+        flash('Accès non autorisé', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    fa = FileAttente.query.get(queue_id)
+    if fa and fa.medecin_id == current_user.id:
+        fa.statut_file = StatutFile.EN_CONSULTATION
+        db.session.commit()
+        flash('Consultation commencée', 'success')
+    
+    return redirect(url_for('main.dashboard'))
+
+@bp.route('/end-consultation/<int:queue_id>')
+@login_required
+def end_consultation(queue_id):
+    if current_user.role != Role.MEDECIN:
+        flash('Accès non autorisé', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    fa = FileAttente.query.get(queue_id)
+    if fa and fa.medecin_id == current_user.id:
+        fa.statut_file = StatutFile.TERMINE
+        fa.rendez_vous.statut = StatutRendezVous.TERMINE
+        invalidate_dossier_resume([fa.patient_id])
+        db.session.commit()
+        flash('Consultation terminée', 'success')
+    
+    return redirect(url_for('main.dashboard'))
+
+# Routes pour le secrétariat
+@bp.route('/queue-management')
+@login_required
+def queue_management():
+    if current_user.role not in STAFF_ROLES:
+        flash('Accès non autorisé', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    today = date.today()
+    
+    # File d'attente du jour organisée par médecin
+    file_attente = {}
+    for entry in read_models.list_queue_entries(today):
+        file_attente.setdefault(entry.medecin_id, []).append(entry)
+    
+    medecins_du_jour = read_models.list_doctors(User.id.in_(list(file_attente))) if file_attente else []
+    
+    return render_template('admin_secretariat/queue_management.html',
+                         medecins_du_jour=medecins_du_jour,
+                         file_attente=file_attente,
+                         date_du_jour=today.strftime('%d/%m/%Y'),
+                         queue_transitions=QUEUE_TRANSITIONS)
+
+@bp.route('/call-patient/<int:file_id>')
+@login_required
+def call_patient(file_id):
+    if current_user.role not in STAFF_ROLES:
+        flash('Accès non autorisé', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    fa = FileAttente.query.get(file_id)
+    if fa:
+        fa.statut_file = StatutFile.EN_CONSULTATION
+        db.session.commit()
+        flash('Patient appelé', 'success')
+    
+    return redirect(url_for('main.queue_management'))
+
+@bp.route('/finish-consultation/<int:file_id>')
+@login_required
+def finish_consultation(file_id):
+    if current_user.role not in STAFF_ROLES:
+        flash('Accès non autorisé', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    fa = FileAttente.query.get(file_id)
+    if fa:
+        fa.statut_file = StatutFile.TERMINE
+        fa.rendez_vous.statut = StatutRendezVous.TERMINE
+        invalidate_dossier_resume([fa.patient_id])
+        db.session.commit()
+        flash('Consultation marquée comme terminée', 'success')
+    
+    return redirect(url_for('main.queue_management'))
+
+@bp.route('/mark-absent/<int:file_id>')
+@login_required
+def mark_absent(file_id):
+    if current_user.role not in STAFF_ROLES:
+        flash('Accès non autorisé', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    fa = FileAttente.query.get(file_id)
+    if fa:
+        fa.statut_file = StatutFile.ABSENT
+        # Libérer le créneau
+        fa.rendez_vous.creneau.disponible = True
+        invalidate_dossier_resume([fa.patient_id])
+        db.session.commit()
+        flash('Patient marqué absent', 'info')
+    
+    return redirect(url_for('main.queue_management'))
+
+# Opérations groupées du secrétariat
+def _bulk_response(summary, message, endpoint):
+    """Résumé JSON pour les appels API, message flash et redirection pour les formulaires."""
+    if request.is_json:
+        return jsonify(summary)
+    flash(message, 'success')
+    return redirect(url_for(endpoint))
+
+@bp.route('/bulk/cancel-doctor-appointments', methods=['POST'])
+@login_required
+def bulk_cancel_doctor_appointments():
+    if current_user.role not in STAFF_ROLES:
+        flash('Accès non autorisé', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    data = request.get_json(silent=True) or request.form
+    try:
+        medecin_id = int(data['medecin_id'])
+        date_debut = datetime.strptime(data['date_debut'], '%Y-%m-%d').date()
+        date_fin = datetime.strptime(data.get('date_fin') or data['date_debut'], '%Y-%m-%d').date()
+    except (KeyError, TypeError, ValueError):
+        if request.is_json:
+            return jsonify({'error': 'Paramètres invalides'}), 400
+        flash('Paramètres invalides', 'danger')
+        return redirect(url_for('main.manage_appointments'))
+    
+    summary = cancel_doctor_appointments(medecin_id, date_debut, date_fin)
+    return _bulk_response(summary,
+                          f"{summary['rendez_vous_annules']} rendez-vous annulés, "
+                          f"{summary['creneaux_liberes']} créneaux libérés",
+                          'main.manage_appointments')
+
+@bp.route('/bulk/mark-absent', methods=['POST'])
+@login_required
+def bulk_mark_absent():
+    if current_user.role not in STAFF_ROLES:
+        flash('Accès non autorisé', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    data = request.get_json(silent=True) or request.form
+    try:
+        jour = datetime.strptime(data['date'], '%Y-%m-%d').date() if data.get('date') else date.today()
+    except ValueError:
+        if request.is_json:
+            return jsonify({'error': 'Paramètres invalides'}), 400
+        flash('Paramètres invalides', 'danger')
+        return redirect(url_for('main.queue_management'))
+    
+    summary = mark_remaining_absent(jour)
+    return _bulk_response(summary, f"{summary['patients_absents']} patients marqués absents", 'main.queue_management')
+
+@bp.route('/bulk/queue-transitions', methods=['POST'])
+@login_required
+def bulk_queue_transitions():
+    if current_user.role not in STAFF_ROLES:
+        flash('Accès non autorisé', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    if request.is_json:
+        # {"transitions": [{"file_id": 1, "statut": "Terminé"}, ...]}
+        data = request.get_json(silent=True) or {}
+        transitions = [(t.get('file_id'), t.get('statut')) for t in data.get('transitions', [])]
+    else:
+        # Formulaire : cases à cocher file_id + un statut cible commun
+        transitions = [(file_id, request.form.get('statut')) for file_id in request.form.getlist('file_id')]
+    
+    try:
+        summary = apply_queue_transitions(transitions)
+    except (TypeError, ValueError):
+        if request.is_json:
+            return jsonify({'error': 'Transitions invalides'}), 400
+        flash('Transitions invalides', 'danger')
+        return redirect(url_for('main.queue_management'))
+    
+    return _bulk_response(summary, f"{sum(summary['file_attente'].values())} patients mis à jour", 'main.queue_management')
+
+# Rapports inter-sites
+@bp.route('/sites-report')
+@login_required
+def sites_report():
+    if current_user.role != Role.ADMIN:
+        flash('Accès non autorisé', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    rapport = sites.fan_out(sites.site_overview)
+    return render_template('admin_secretariat/sites_report.html', rapport=rapport)
+
+# Rapports mensuels d'activité
+@bp.route('/reports')
+@login_required
+def reports():
+    if current_user.role != Role.ADMIN:
+        flash('Accès non autorisé', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    from . import analytics  # NumPy n'est importé qu'à la première demande de rapport
+    try:
+        mois = analytics.parse_month(request.args['mois']) if request.args.get('mois') else analytics.previous_month()
+    except ValueError:
+        flash('Mois invalide', 'danger')
+        mois = analytics.previous_month()
+    
+    rapport = analytics.monthly_report(mois)
+    return render_template('admin_secretariat/reports.html', rapport=rapport, mois=mois)
+
+# Routes pour la gestion du personnel (placeholders)
+@bp.route('/manage-personnel')
+@login_required
+def manage_personnel():
+    if current_user.role != Role.ADMIN:
+        flash('Accès non autorisé', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    personnel = read_models.list_personnel()
+    return render_template('admin_secretariat/manage_personnel.html', personnel=personnel)
+
+@bp.route('/add-personnel', methods=['GET', 'POST'])
+@login_required
+def add_personnel():
+    if current_user.role != Role.ADMIN:
+        flash('Accès non autorisé', 'danger')
+        return redirect(url_for('main.dashboard'))
+
+    if request.method == 'POST':
+        email = request.form['email']
+        if sites.email_taken(email):
+            flash('Cet email est déjà utilisé.', 'danger')
+            return redirect(request.url)
+        try:
+            role = Role.coerce(request.form['role'])
+        except ValueError:
+            flash('Rôle invalide.', 'danger')
+            return redirect(request.url)
+
+        user = User(
+            nom=request.form['nom'],
+            prenom=request.form['prenom'],
+            email=email,
+            role=role,
+            contact=request.form.get('contact'),
+            specialite=request.form.get('specialite') if role == Role.MEDECIN else None,
+            salle_id=request.form.get('salle_id') if role == Role.MEDECIN else None,
+            site=sites.current_site()
+        )
+        user.set_password(request.form['password'])
+        db.session.add(user)
+        db.session.flush()
+        sites.register(user)
+        db.session.commit()
+        flash('Le membre du personnel a été ajouté avec succès.', 'success')
+        return redirect(url_for('main.manage_personnel'))
+
+    salles = read_models.list_salle_options()
+    return render_template('admin_secretariat/edit_personnel.html', action='Ajouter', salles=salles)
+
+@bp.route('/edit-personnel/<int:user_id>', methods=['GET', 'POST'])
+@login_required
+def edit_personnel(user_id):
+    if current_user.role != Role.ADMIN:
+        flash('Accès non autorisé', 'danger')
+        return redirect(url_for('main.dashboard'))
+
+    user_to_edit = User.query.get_or_404(user_id)
+
+    if request.method == 'POST':
+        # Vérifier si l'email a changé et s'il est unique
+        new_email = request.form['email']
+        if new_email != user_to_edit.email and sites.email_taken(new_email):
+            flash('Ce nouvel email est déjà utilisé.', 'danger')
+            return redirect(request.url)
+        try:
+            new_role = Role.coerce(request.form.get('role', user_to_edit.role))
+        except ValueError:
+            flash('Rôle invalide.', 'danger')
+            return redirect(request.url)
+
+        if new_email != user_to_edit.email:
+            sites.unregister(user_to_edit.email)
+        user_to_edit.nom = request.form['nom']
+        user_to_edit.prenom = request.form['prenom']
+        user_to_edit.email = new_email
+        sites.register(user_to_edit)
+        user_to_edit.contact = request.form.get('contact')
+        
+        # Ne pas permettre de changer le rôle d'un admin pour éviter de se bloquer
+        if user_to_edit.role != Role.ADMIN:
+            user_to_edit.role = new_role
+
+        if user_to_edit.role == Role.MEDECIN:
+            user_to_edit.specialite = request.form.get('specialite')
+            user_to_edit.salle_id = request.form.get('salle_id') if request.form.get('salle_id') else None
+        else:
+            user_to_edit.specialite = None
+            user_to_edit.salle_id = None
+
+        if request.form.get('password'):
+            user_to_edit.set_password(request.form['password'])
+
+        db.session.commit()
+        flash('Les informations ont été mises à jour.', 'success')
+        return redirect(url_for('main.manage_personnel'))
+
+    salles = read_models.list_salle_options()
+    return render_template('admin_secretariat/edit_personnel.html', action='Modifier', user=user_to_edit, salles=salles)
+
+@bp.route('/delete-personnel/<int:user_id>', methods=['POST'])
+@login_required
+def delete_personnel(user_id):
+    """API pour supprimer un membre du personnel."""
+    if current_user.role != Role.ADMIN:
+        flash('Accès non autorisé', 'danger')
+        return redirect(url_for('main.dashboard'))
+
+    user_to_delete = User.query.get_or_404(user_id)
+
+    if user_to_delete.id == current_user.id:
+        flash('Vous ne pouvez pas supprimer votre propre compte.', 'danger')
+        return redirect(url_for('main.manage_personnel'))
+
+    # Vérifier si le médecin a des rendez-vous
+    if user_to_delete.role == Role.MEDECIN:
+        if RendezVous.query.filter_by(medecin_id=user_id).first():
+            flash('Impossible de supprimer ce médecin car il a des rendez-vous associés.', 'danger')
+            return redirect(url_for('main.manage_personnel'))
+
+    sites.unregister(user_to_delete.email)
+    db.session.delete(user_to_delete)
+    db.session.commit()
+
+    flash('Le membre du personnel a été supprimé avec succès.', 'success')
+    return redirect(url_for('main.manage_personnel'))
+
+@bp.route('/manage-patients')
+@login_required
+def manage_patients():
+    if current_user.role not in STAFF_ROLES:
+        flash('Accès non autorisé', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    patients = read_models.list_patients()
+    return render_template('admin_secretariat/manage_patients.html', patients=patients)
+
+@bp.route('/edit-patient/<int:patient_id>', methods=['GET', 'POST'])
+@login_required
+def edit_patient(patient_id):
+    if current_user.role not in STAFF_ROLES:
+        flash('Accès non autorisé', 'danger')
+        return redirect(url_for('main.dashboard'))
+
+    patient = User.query.get_or_404(patient_id)
+    if patient.role != Role.PATIENT:
+        flash('Utilisateur non valide.', 'danger')
+        return redirect(url_for('main.manage_patients'))
+
+    if request.method == 'POST':
+        patient.nom = request.form['nom']
+        patient.prenom = request.form['prenom']
+        patient.contact = request.form['contact']
+        if request.form['date_naissance']:
+            patient.date_naissance = datetime.strptime(request.form['date_naissance'], '%Y-%m-%d').date()
+        
+        if request.form.get('password'):
+            patient.set_password(request.form['password'])
+
+        db.session.commit()
+        flash('Les informations du patient ont été mises à jour.', 'success')
+        return redirect(url_for('main.manage_patients'))
+
+    return render_template('admin_secretariat/edit_patient.html', patient=patient)
+
+@bp.route('/manage-rooms')
+@login_required
+def manage_rooms():
+    if current_user.role not in STAFF_ROLES:
+        flash('Accès non autorisé', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    salles = read_models.list_salles()
+    return render_template('admin_secretariat/manage_rooms.html', salles=salles)
+
+def _availability_from_args():
+    """(jour, debut, fin) de la recherche de disponibilités ; debut et fin sont optionnels."""
+    jour = request.args.get('date')
+    debut = request.args.get('debut')
+    fin = request.args.get('fin')
+    jour = datetime.strptime(jour, '%Y-%m-%d').date() if jour else date.today()
+    debut = datetime.strptime(debut, '%H:%M').time() if debut else None
+    fin = datetime.strptime(fin, '%H:%M').time() if fin else None
+    if debut and fin and debut >= fin:
+        raise ValueError("L'heure de fin doit suivre l'heure de début")
+    return jour, debut, fin
+
+@bp.route('/availability')
+@login_required
+def day_availability():
+    """Grille des disponibilités du jour (médecins et salles) et recherche d'une plage libre."""
+    if current_user.role not in STAFF_ROLES:
+        flash('Accès non autorisé', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    try:
+        jour, debut, fin = _availability_from_args()
+    except ValueError:
+        flash('Date ou heures invalides', 'danger')
+        jour, debut, fin = date.today(), None, None
+    
+    from . import availability  # Import différé (NumPy)
+    dispo = availability.day_availability(jour)
+    heure_debut = current_app.config['AVAILABILITY_GRID_START_HOUR']
+    heure_fin = current_app.config['AVAILABILITY_GRID_END_HOUR']
+    grid_start, grid_end = time(heure_debut), time(heure_fin) if heure_fin < 24 else time(23, 59)
+    recherche = None
+    if debut and fin:
+        recherche = {'medecins': dispo.free_doctors(debut, fin), 'salles': dispo.free_rooms(debut, fin)}
+    
+    return render_template('admin_secretariat/availability.html',
+                         jour=jour, debut=debut, fin=fin, recherche=recherche,
+                         cell_minutes=dispo.cell_minutes,
+                         heures=range(heure_debut, heure_fin),
+                         doctor_grid=dispo.doctor_grid(grid_start, grid_end),
+                         room_grid=dispo.room_grid(grid_start, grid_end))
+
+@bp.route('/api/availability')
+@login_required
+def api_availability():
+    """API : médecins et salles libres sur toute la plage [debut, fin) d'un jour."""
+    if current_user.role not in STAFF_ROLES:
+        return jsonify({'error': 'Accès non autorisé'}), 403
+    
+    try:
+        jour, debut, fin = _availability_from_args()
+    except ValueError:
+        return jsonify({'error': 'Format de date ou d\'heure invalide'}), 400
+    if not (debut and fin):
+        return jsonify({'error': 'Paramètres debut et fin requis'}), 400
+    
+    from . import availability  # Import différé (NumPy)
+    dispo = availability.day_availability(jour)
+    return jsonify({
+        'date': jour.strftime('%Y-%m-%d'),
+        'medecins': [medecin._asdict() for medecin in dispo.free_doctors(debut, fin)],
+        'salles': [salle._asdict() for salle in dispo.free_rooms(debut, fin)]
+    })
+
+@bp.route('/manage-appointments')
+@login_required
+def manage_appointments():
+    if current_user.role not in STAFF_ROLES:
+        flash('Accès non autorisé', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    appointments = read_models.list_appointments()
+    medecins = read_models.list_doctors()
+    return render_template('admin_secretariat/manage_appointments.html', appointments=appointments, medecins=medecins)
+
+@bp.route('/view-patient-dossier/<int:patient_id>')
+@login_required
+def view_patient_dossier(patient_id):
+    if current_user.role not in PERSONNEL_ROLES:
+        flash('Accès non autorisé', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    patient = User.query.get(patient_id)
+    if not patient or patient.role != Role.PATIENT:
+        flash('Patient non trouvé', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    resume = get_dossier_resume(patient_id)
+    historique, next_cursor = history_page(patient_id)
+    
+    return render_template('medecin/patient_dossier.html', patient=patient, resume=resume,
+                           historique=historique, next_cursor=next_cursor)
+
+@bp.route('/view-patient-dossier/<int:patient_id>/historique')
+@login_required
+def patient_history(patient_id):
+    """API : page suivante de l'historique du dossier (pagination par clé)."""
+    if current_user.role not in PERSONNEL_ROLES:
+        return jsonify({'error': 'Accès non autorisé'}), 403
+    
+    try:
+        historique, next_cursor = history_page(patient_id, request.args.get('cursor'))
+    except ValueError:
+        return jsonify({'error': 'Curseur invalide'}), 400
+    
+    return jsonify({
+        'items': [
+            {
+                'date': rv.date.strftime('%d/%m/%Y'),
+                'heure': rv.heure.strftime('%H:%M'),
+                'medecin_nom': rv.medecin_nom,
+                'statut': rv.statut.label,
+                'code': int(rv.statut),
+                'badge': badge_class(rv.statut)
+            }
+            for rv in historique
+        ],
+        'next_cursor': next_cursor
+    })
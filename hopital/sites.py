@@ -0,0 +1,136 @@
+"""
+Déploiement multi-site.
+
+Chaque site a sa propre base (utilisateurs, salles, créneaux, rendez-vous, file
+d'attente...) ; SiteRoutingSession y envoie les requêtes selon g.site. Un annuaire
+partagé associe chaque email à son site pour la connexion. Les rapports
+inter-sites interrogent les bases en parallèle.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date
+
+from flask import current_app, g
+
+from .enums import Role, StatutRendezVous
+from .extensions import db, login_manager, site_bind_key
+from .models import User, Creneau, RendezVous, FileAttente, AnnuaireUtilisateur
+
+
+def configure(app):
+    """Déclare les binds de l'annuaire et des sites supplémentaires (avant db.init_app)."""
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    binds['annuaire'] = app.config['DIRECTORY_DATABASE_URL'] or app.config['SQLALCHEMY_DATABASE_URI']
+    for site, uri in app.config['SITES_DATABASE_URLS'].items():
+        if site != app.config['DEFAULT_SITE']:
+            binds[site_bind_key(site, app.config['DEFAULT_SITE'])] = uri
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+
+def site_keys():
+    default = current_app.config['DEFAULT_SITE']
+    return [default] + [site for site in current_app.config['SITES_DATABASE_URLS'] if site != default]
+
+
+def current_site():
+    return g.get('site') or current_app.config['DEFAULT_SITE']
+
+
+def set_current_site(site):
+    """Bascule le contexte courant sur un site ; la session est vidée pour ne pas mélanger deux bases."""
+    if site not in site_keys():
+        raise ValueError(f"Site inconnu : {site}")
+    if site != current_site():
+        db.session.close()
+    g.site = site
+
+
+@contextmanager
+def use_site(site):
+    previous = current_site()
+    set_current_site(site)
+    try:
+        yield
+    finally:
+        set_current_site(previous)
+
+
+def site_engine(site=None):
+    return db.engines[site_bind_key(site or current_site(), current_app.config['DEFAULT_SITE'])]
+
+
+def create_all():
+    """Crée les tables de la base principale, de l'annuaire et de chaque site supplémentaire."""
+    db.create_all()
+    for site in site_keys()[1:]:
+        db.metadata.create_all(site_engine(site))
+
+
+@login_manager.user_loader
+def load_user(user_id):
+    site, _, raw_id = user_id.rpartition(':')
+    try:
+        set_current_site(site or current_app.config['DEFAULT_SITE'])
+    except ValueError:
+        return None
+    return User.query.get(int(raw_id))
+
+
+# Annuaire de connexion
+def lookup(email):
+    return AnnuaireUtilisateur.query.get(email)
+
+
+def email_taken(email):
+    return lookup(email) is not None or User.query.filter_by(email=email).first() is not None
+
+
+def register(user):
+    """Enregistre (ou met à jour) l'utilisateur dans l'annuaire ; l'id doit être attribué (flush)."""
+    db.session.merge(AnnuaireUtilisateur(email=user.email, site=user.site, user_id=user.id))
+
+
+def unregister(email):
+    AnnuaireUtilisateur.query.filter_by(email=email).delete(synchronize_session=False)
+
+
+def sync_directory(site):
+    """Reconstruit les entrées d'annuaire d'un site à partir de sa table des utilisateurs."""
+    with use_site(site):
+        users = db.session.query(User.id, User.email).all()
+        AnnuaireUtilisateur.query.filter_by(site=site).delete(synchronize_session=False)
+        db.session.bulk_insert_mappings(AnnuaireUtilisateur, [
+            {'email': email, 'site': site, 'user_id': user_id} for user_id, email in users
+        ])
+        db.session.commit()
+        return len(users)
+
+
+# Rapports inter-sites
+def fan_out(fn, sites=None, max_workers=None):
+    """Exécute fn(site) sur chaque site en parallèle (un contexte et une session par site) ; retourne {site: résultat}."""
+    app = current_app._get_current_object()
+    sites = sites or site_keys()
+
+    def run(site):
+        with app.app_context():
+            set_current_site(site)
+            try:
+                return fn(site)
+            finally:
+                db.session.remove()
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(sites)) as pool:
+        return dict(zip(sites, pool.map(run, sites)))
+
+
+def site_overview(site):
+    today = date.today()
+    return {
+        'medecins': User.query.filter_by(role=Role.MEDECIN).count(),
+        'patients': User.query.filter_by(role=Role.PATIENT).count(),
+        'creneaux_libres': Creneau.query.filter(Creneau.date >= today, Creneau.disponible == True).count(),
+        'rendez_vous_a_venir': RendezVous.query.filter(RendezVous.date >= today, RendezVous.statut == StatutRendezVous.CONFIRME).count(),
+        'file_attente_du_jour': FileAttente.query.filter(FileAttente.date == today).count(),
+    }
@@ -0,0 +1,188 @@
+"""
+Purge des créneaux expirés jamais réservés.
+
+Un créneau publié reste en base indéfiniment ; ceux dont la date est passée sans
+réservation (disponible=True) ne font qu'alourdir les recherches de créneaux. La
+tâche planifiée `flask purge-slots` les supprime par petits lots (une transaction
+par lot), à débit limité. Un créneau référencé par un rendez-vous n'est jamais
+supprimé, quel que soit son état. Chaque lot publie un seul événement
+creneaux.purges (nombre et bornes des identifiants) dans sa transaction.
+
+Les créneaux libres forment le dénominateur de l'occupation des rapports mensuels :
+seuls les mois dont le rapport est déjà figé (RapportMensuel) sont purgés ; les
+autres sont conservés et signalés jusqu'au calcul de leur rapport.
+
+Espace : un DELETE ne réduit pas la taille d'une table (InnoDB et SQLite gardent
+les pages libérées pour les insertions suivantes). La tâche rapporte l'espace
+réellement rendu libre (data_free sous MySQL, pages de la freelist sous SQLite)
+et une estimation (taille moyenne d'une ligne, index compris, × lignes supprimées),
+calculée de la même façon en simulation et en exécution réelle.
+"""
+
+import time as time_module
+from datetime import date, timedelta
+
+from flask import current_app, has_request_context
+from sqlalchemy import and_, delete, exists, false, func, or_, select, text
+from sqlalchemy.exc import OperationalError
+
+from . import events, sites
+from .extensions import db
+from .models import Creneau, RendezVous, RapportMensuel
+
+
+def _next_month(mois):
+    return (mois.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _frozen_ranges(connection, cutoff):
+    """Plages [début, fin) des mois dont le rapport est figé, bornées à cutoff ; mois consécutifs fusionnés."""
+    ranges = []
+    for cle in sorted(connection.execute(select(RapportMensuel.mois)).scalars()):
+        debut = date(int(cle[:4]), int(cle[5:7]), 1)
+        if debut >= cutoff:
+            break
+        fin = min(_next_month(debut), cutoff)
+        if ranges and ranges[-1][1] == debut:
+            ranges[-1] = (ranges[-1][0], fin)
+        else:
+            ranges.append((debut, fin))
+    return ranges
+
+
+def _expired(cutoff):
+    """Créneau antérieur à cutoff, resté libre et sans aucun rendez-vous."""
+    return (
+        Creneau.date < cutoff,
+        Creneau.disponible == True,
+        ~exists().where(RendezVous.creneau_id == Creneau.id),
+    )
+
+
+def _purgeable(cutoff, ranges):
+    """Créneau expiré d'un mois dont le rapport mensuel est figé."""
+    in_frozen_month = or_(*(and_(Creneau.date >= debut, Creneau.date < fin) for debut, fin in ranges)) if ranges else false()
+    return _expired(cutoff) + (in_frozen_month,)
+
+
+def _months_without_report(connection, cutoff, ranges):
+    """Mois clos ('AAAA-MM') ayant des créneaux expirés mais pas de rapport figé : conservés par la purge."""
+    oldest = connection.execute(select(func.min(Creneau.date)).where(*_expired(cutoff))).scalar()
+    limite = min(cutoff, date.today().replace(day=1))
+    mois, manquants = oldest.replace(day=1) if oldest else limite, []
+    while mois < limite:
+        if not any(debut <= mois < fin for debut, fin in ranges):
+            manquants.append(mois.strftime('%Y-%m'))
+        mois = _next_month(mois)
+    return manquants
+
+
+def table_space(connection, table_name):
+    """(octets de la table et de ses index, octets libres réutilisables), None si la base ne l'expose pas."""
+    if connection.dialect.name == 'mysql':
+        # Les statistiques InnoDB ne sont pas recalculées après un DELETE
+        connection.execute(text(f"ANALYZE TABLE {connection.dialect.identifier_preparer.quote(table_name)}")).all()
+        return tuple(connection.execute(text(
+            "SELECT data_length + index_length, data_free FROM information_schema.tables "
+            "WHERE table_schema = DATABASE() AND table_name = :table"
+        ), {'table': table_name}).one())
+    if connection.dialect.name == 'sqlite':
+        libres = (connection.execute(text("PRAGMA freelist_count")).scalar()
+                  * connection.execute(text("PRAGMA page_size")).scalar())
+        try:
+            taille = connection.execute(text(
+                "SELECT SUM(pgsize) FROM dbstat WHERE name IN "
+                "(SELECT name FROM sqlite_master WHERE tbl_name = :table)"
+            ), {'table': table_name}).scalar()
+        except OperationalError:  # SQLite compilé sans dbstat
+            taille = None
+        return taille, libres
+    return None, None
+
+
+def purge_expired_slots(older_than_days=None, batch_size=None, max_rows_per_second=None, dry_run=False):
+    """
+    Supprime les créneaux libres dont la date précède aujourd'hui de plus de
+    `older_than_days` jours, dans la base du site courant (sites.use_site), pour les
+    mois dont le rapport mensuel est figé ; les autres mois sont retournés dans
+    `mois_sans_rapport`.
+
+    Chaque lot relit et verrouille (FOR UPDATE) les identifiants au-delà du dernier
+    traité, les supprime en revérifiant les conditions (un créneau réservé
+    entre-temps est conservé) et publie creneaux.purges pour le lot.
+    `max_rows_per_second` (0 : sans limite) espace les lots pour ne pas saturer la
+    base. En `dry_run`, rien n'est supprimé : le nombre de créneaux purgeables et
+    l'espace estimé sont retournés.
+    """
+    if has_request_context():
+        raise RuntimeError("La purge des créneaux ne doit pas être exécutée dans une requête web.")
+
+    config = current_app.config
+    older_than_days = config['SLOT_PURGE_AGE_DAYS'] if older_than_days is None else older_than_days
+    batch_size = batch_size or config['SLOT_PURGE_BATCH_SIZE']
+    if max_rows_per_second is None:
+        max_rows_per_second = config['SLOT_PURGE_MAX_ROWS_PER_SECOND']
+    if older_than_days < 0 or batch_size < 1 or max_rows_per_second < 0:
+        raise ValueError("Âge, taille de lot et débit doivent être positifs")
+
+    cutoff = date.today() - timedelta(days=older_than_days)
+    engine = sites.site_engine()
+    table_name = Creneau.__tablename__
+    stats = {'date_limite': cutoff, 'supprimes': 0, 'lots': 0, 'mois_sans_rapport': [], 'octets_table': None,
+             'octets_estimes': None, 'octets_liberes': None, 'duree': 0.0}
+    started = time_module.monotonic()
+
+    with engine.connect() as connection:
+        ranges = _frozen_ranges(connection, cutoff)
+        stats['octets_table'], libres_avant = table_space(connection, table_name)
+        stats['mois_sans_rapport'] = _months_without_report(connection, cutoff, ranges)
+        total = connection.execute(select(func.count()).select_from(Creneau)).scalar()
+        if dry_run:
+            stats['supprimes'] = connection.execute(
+                select(func.count()).select_from(Creneau).where(*_purgeable(cutoff, ranges))
+            ).scalar()
+    octets_par_ligne = stats['octets_table'] / total if stats['octets_table'] is not None and total else None
+
+    if not dry_run:
+        last_id = 0
+        while True:
+            try:
+                ids = db.session.execute(
+                    select(Creneau.id).where(Creneau.id > last_id, *_purgeable(cutoff, ranges))
+                    .order_by(Creneau.id).limit(batch_size).with_for_update()
+                ).scalars().all()
+                if not ids:
+                    db.session.rollback()
+                    break
+                # Un créneau réservé entre la lecture et la suppression est conservé
+                deleted = db.session.execute(
+                    delete(Creneau).where(Creneau.id.in_(ids), *_purgeable(cutoff, ranges))
+                ).rowcount
+                if deleted:
+                    # Un seul événement par lot : le journal ne grossit pas d'une ligne par créneau supprimé
+                    events.emit(db.session, events.SLOTS_PURGED, ids[-1], nombre=deleted,
+                                premier_id=ids[0], dernier_id=ids[-1], date_limite=cutoff)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            stats['supprimes'] += deleted
+            stats['lots'] += 1
+            last_id = ids[-1]
+            if max_rows_per_second:
+                retard = started + stats['supprimes'] / max_rows_per_second - time_module.monotonic()
+                if retard > 0:
+                    time_module.sleep(retard)
+
+        with engine.connect() as connection:
+            _, libres_apres = table_space(connection, table_name)
+        if libres_avant is not None and libres_apres is not None:
+            stats['octets_liberes'] = max(libres_apres - libres_avant, 0)
+
+    if octets_par_ligne is not None:
+        stats['octets_estimes'] = round(octets_par_ligne * stats['supprimes'])
+    stats['duree'] = time_module.monotonic() - started
+    if not dry_run:
+        current_app.logger.info("Purge des créneaux avant le %s : %s supprimés en %s lots",
+                                cutoff, stats['supprimes'], stats['lots'])
+    return stats
@@ -0,0 +1,79 @@
+"""
+Recherche des premiers créneaux libres d'une spécialité, tous médecins confondus.
+"""
+
+import heapq
+from collections import namedtuple
+from datetime import date
+from itertools import islice
+from operator import attrgetter
+
+from sqlalchemy import select, union_all
+
+from .enums import Role
+from .extensions import db
+from .models import User, Creneau
+
+CreneauLibre = namedtuple('CreneauLibre', [
+    'id', 'medecin_id', 'medecin_nom', 'date', 'heure_debut', 'heure_fin'
+])
+
+
+# Médecins par requête UNION ALL (taille bornée de l'instruction SQL)
+DOCTORS_PER_QUERY = 100
+
+
+def _doctor_streams(medecin_ids, limit, filters):
+    """Les `limit` premiers créneaux libres de chaque médecin, chacun lu par son propre ORDER BY ... LIMIT."""
+    streams = {}
+    for debut in range(0, len(medecin_ids), DOCTORS_PER_QUERY):
+        parts = []
+        for medecin_id in medecin_ids[debut:debut + DOCTORS_PER_QUERY]:
+            # Parcours d'intervalle sur ix_creneau_medecin_dispo_date, arrêté après `limit` lignes
+            par_medecin = select(
+                Creneau.id, Creneau.medecin_id, Creneau.date, Creneau.heure_debut, Creneau.heure_fin
+            ).where(Creneau.medecin_id == medecin_id, *filters).order_by(
+                Creneau.date, Creneau.heure_debut
+            ).limit(limit).subquery()
+            parts.append(select(par_medecin))
+        for row in db.session.execute(union_all(*parts)):
+            streams.setdefault(row.medecin_id, []).append(row)
+    # L'ordre des lignes d'un UNION ALL n'est pas garanti : chaque flux (au plus `limit` lignes) est retrié
+    return [sorted(rows, key=attrgetter('date', 'heure_debut')) for rows in streams.values()]
+
+
+def first_available_slots(specialite, limit=10, jour=None, heure_min=None, heure_max=None):
+    """
+    Retourne les `limit` premiers créneaux libres de la spécialité, triés par date et heure.
+
+    Les médecins de la spécialité sont lus d'abord ; chacun a ensuite sa propre
+    sous-requête ORDER BY date, heure LIMIT `limit` (réunies par UNION ALL), servie
+    par l'index ix_creneau_medecin_dispo_date qui s'arrête après `limit` entrées.
+    Ces flux, déjà triés, sont fusionnés par tas. Le volume lu reste borné par
+    nombre de médecins × limit, quelle que soit la profondeur du planning.
+    """
+    medecins = {
+        medecin_id: f"{nom} {prenom}"
+        for medecin_id, nom, prenom in db.session.execute(
+            select(User.id, User.nom, User.prenom)
+            .where(User.role == Role.MEDECIN, User.specialite == specialite)
+        )
+    }
+    if not medecins or limit < 1:
+        return []
+
+    filters = [
+        Creneau.disponible == True,
+        Creneau.date == jour if jour else Creneau.date >= date.today(),
+    ]
+    if heure_min:
+        filters.append(Creneau.heure_debut >= heure_min)
+    if heure_max:
+        filters.append(Creneau.heure_fin <= heure_max)
+
+    streams = _doctor_streams(list(medecins), limit, filters)
+    merged = heapq.merge(*streams, key=lambda r: (r.date, r.heure_debut, r.medecin_id))
+    return [
+        CreneauLibre(r.id, r.medecin_id, medecins[r.medecin_id], r.date, r.heure_debut, r.heure_fin)
+        for r in islice(merged, limit)
+    ]
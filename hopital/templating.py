@@ -0,0 +1,53 @@
+"""
+Compilation des templates Jinja.
+
+Le code compilé de chaque template est conservé sur disque (FileSystemBytecodeCache) :
+un nouveau worker relit ce code au lieu de reparser le source. TEMPLATE_WARMUP
+compile tous les templates au démarrage ; avec preload_app (Gunicorn), le master
+le fait une fois et les workers en héritent par fork.
+
+Les classes CSS des badges de rôle et de statut sont définies ici, une fois pour
+les templates (filtre badge_class) et pour les API consommées en JavaScript.
+"""
+
+import os
+
+from jinja2 import FileSystemBytecodeCache
+
+from .enums import Role, StatutRendezVous, StatutFile
+
+# Par enum : les membres de deux enums différents peuvent avoir le même code
+BADGE_CLASSES = {
+    Role: {Role.MEDECIN: 'bg-info', Role.SECRETAIRE: 'bg-warning text-dark', Role.ADMIN: 'bg-danger'},
+    StatutRendezVous: {StatutRendezVous.CONFIRME: 'bg-primary', StatutRendezVous.TERMINE: 'bg-success',
+                       StatutRendezVous.ANNULE: 'bg-danger'},
+    StatutFile: {StatutFile.EN_ATTENTE: 'bg-warning text-dark', StatutFile.EN_CONSULTATION: 'bg-success'},
+}
+
+
+def badge_class(value):
+    """Classe CSS du badge d'un rôle ou d'un statut."""
+    return BADGE_CLASSES.get(type(value), {}).get(value, 'bg-secondary')
+
+
+def bytecode_cache_dir(app):
+    return app.config['JINJA_BYTECODE_CACHE_DIR'] or os.path.join(app.instance_path, 'jinja_cache')
+
+
+def warm_up(app):
+    """Compile (et met en cache) tous les templates de l'application ; retourne leur nombre."""
+    names = app.jinja_env.list_templates(extensions=('html',))
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+
+def init_app(app):
+    """Installe le filtre badge_class et le cache de bytecode avant le premier chargement de template."""
+    app.jinja_env.filters['badge_class'] = badge_class
+    if app.config['JINJA_BYTECODE_CACHE']:
+        directory = bytecode_cache_dir(app)
+        os.makedirs(directory, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+    if app.config['TEMPLATE_WARMUP']:
+        warm_up(app)
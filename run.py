@@ -5,16 +5,18 @@ Script de démarrage pour l'application de gestion hospitalière
 
 import os
 from app import app, db, User, Salle
+from hopital import sites
+from hopital.enums import Role
 
 def create_admin_user():
     """Crée un utilisateur administrateur par défaut s'il n'existe pas"""
-    admin_exists = User.query.filter_by(role='admin').first()
+    admin_exists = User.query.filter_by(role=Role.ADMIN).first()
     if not admin_exists:
         admin = User(
             nom='Admin',
             prenom='Système',
             email='admin@hopital.com',
-            role='admin',
+            role=Role.ADMIN,
             contact='0000000000'
         )
         admin.set_password('admin123')
@@ -37,14 +39,14 @@ def create_admin_user():
 
 def create_sample_medecin():
     """Crée un médecin de test s'il n'existe pas"""
-    medecin_exists = User.query.filter_by(role='medecin').first()
+    medecin_exists = User.query.filter_by(role=Role.MEDECIN).first()
     if not medecin_exists:
         salle = Salle.query.first()
         medecin = User(
             nom='Dupont',
             prenom='Jean',
             email='jean.dupont@hopital.com',
-            role='medecin',
+            role=Role.MEDECIN,
             contact='0123456789',
             specialite='Médecine Générale',
             salle_id=salle.id if salle else None
@@ -56,13 +58,14 @@ def create_sample_medecin():
 
 if __name__ == '__main__':
     with app.app_context():
-        # Créer toutes les tables
-        db.create_all()
+        # Créer toutes les tables (base principale, annuaire et sites supplémentaires)
+        sites.create_all()
         print("Base de données initialisée")
         
         # Créer les utilisateurs par défaut
         create_admin_user()
         create_sample_medecin()
+        sites.sync_directory(app.config['DEFAULT_SITE'])
         
         print("\n" + "="*50)
         print("APPLICATION DE GESTION HOSPITALIÈRE")
@@ -73,4 +76,4 @@ if __name__ == '__main__':
         print("="*50 + "\n")
     
     # Démarrer l'application
-    app.run(debug=True, host='0.0.0.0', port=5002)
+    app.run(debug=app.config['DEBUG'], host='0.0.0.0', port=5002)
@@ -0,0 +1,11 @@
+"""
+Point d'entrée WSGI de production.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import os
+
+from hopital import create_app
+
+app = create_app(os.environ.get('FLASK_ENV', 'production'))